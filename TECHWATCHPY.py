@@ -1,20 +1,158 @@
 import tkinter as tk
+import tkinter.font as tkfont
 from tkinter import ttk, messagebox, filedialog, scrolledtext
 from tkinter.simpledialog import askstring
-import pandas as pd
 from datetime import datetime
+import importlib
+from importlib.metadata import version
 import logging
+import logging.handlers
 import json
 import os
+import bisect
+import threading
+import sys
+import time
+import argparse
+import sqlite3
+import http.server
+import urllib.parse
+import urllib.request
+import uuid
+import shlex
+import gzip
+import unicodedata
+import atexit
+import queue
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from functools import partial, wraps
 from tkinter.ttk import Progressbar
 
-# Configuração do Logging
-logging.basicConfig(filename='inventory.log', level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+class LazyModule:
+    # numpy/pandas (e os motores de Excel/Arrow, importados dentro das funções)
+    # só carregam no primeiro uso: a janela aparece antes. Depois do primeiro
+    # acesso o nome global passa a apontar para o módulo de verdade.
+    def __init__(self, name, alias):
+        self.name = name
+        self.alias = alias
+
+    def __getattr__(self, attribute):
+        module = importlib.import_module(self.name)
+        globals()[self.alias] = module
+        return getattr(module, attribute)
+
+np = LazyModule("numpy", "np")
+pd = LazyModule("pandas", "pd")
+
+# Configuração do Logging: os registros entram numa fila e uma thread própria
+# grava inventory.log, então o loop do Tk nunca espera pelo disco
+LOG_FILE = 'inventory.log'
+log_queue = queue.SimpleQueue()
+log_file_handler = logging.FileHandler(LOG_FILE)
+log_file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+log_listener = logging.handlers.QueueListener(log_queue, log_file_handler)
+log_queue_handler = logging.handlers.QueueHandler(log_queue)
+log_queue_handler.setFormatter(logging.Formatter('%(message)s'))  # O formato final é aplicado na gravação
+logging.basicConfig(level=logging.INFO, handlers=[log_queue_handler])
+log_listener.start()
+atexit.register(log_listener.stop)  # Esvazia a fila antes de sair
+
+class Metrics:
+    # Instrumentação do caminho crítico (operações do modelo e fases do
+    # redesenho da tabela). Sempre ativa e barata: por trecho guarda chamadas,
+    # total, máximo e as últimas SAMPLES durações, de onde saem os percentis.
+    # O perfil com cProfile é opcional e só cobre a thread principal.
+    SAMPLES = 1000
+    PROFILE_FILE = "perfil.prof"
+    PROFILE_LINES = 40
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.profiler = None
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.spans = {}
+            self.counters = Counter()
+            self.started = time.perf_counter()
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self.lock:
+            entry = self.spans.get(name)
+            if entry is None:
+                entry = self.spans[name] = [0, 0.0, 0.0, deque(maxlen=self.SAMPLES)]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            entry[3].append(seconds)
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def snapshot(self):
+        with self.lock:
+            spans = {name: (calls, total, longest, sorted(recent))
+                     for name, (calls, total, longest, recent) in self.spans.items()}
+            counters = dict(self.counters)
+            seconds = time.perf_counter() - self.started
+        report = {}
+        for name, (calls, total, longest, recent) in sorted(spans.items()):
+            percentile = lambda q: recent[min(len(recent) - 1, int(q * len(recent)))] * 1000
+            report[name] = {"chamadas": calls, "total_ms": total * 1000, "p50_ms": percentile(0.5),
+                            "p90_ms": percentile(0.9), "p99_ms": percentile(0.99), "max_ms": longest * 1000}
+        return {"gerado_em": datetime.now().isoformat(timespec="seconds"), "segundos": seconds,
+                "trechos": report, "contadores": dict(sorted(counters.items()))}
+
+    def export(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+
+    @property
+    def profiling(self):
+        return self.profiler is not None
+
+    def start_profile(self):
+        import cProfile
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def stop_profile(self, path=PROFILE_FILE):
+        # Grava o perfil completo (para pstats/snakeviz) e devolve o resumo em texto
+        import io
+        import pstats
+        profiler, self.profiler = self.profiler, None
+        profiler.disable()
+        profiler.dump_stats(path)
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(self.PROFILE_LINES)
+        return text.getvalue()
+
+METRICS = Metrics()
+
+def timed(name):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with METRICS.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
 
 # Carregar configurações
 CONFIG_FILE = "config.json"
 DEFAULT_CONFIG = {"geometry": "1200x800", "last_dir": "."}
+MAINTENANCE_DAYS = 365  # Prazo padrão entre manutenções ("maintenance_days" no config.json)
 
 def load_config():
     try:
@@ -35,6 +173,236 @@ def save_config(config):
 
 config = load_config()
 
+COLUMNS = [
+    "Número de Patrimônio", "Tipo", "Nome", "Modelo", "Setor", "Usuário",
+    "Memória RAM", "S.O.", "Processador", "Data de Compra",
+    "Última Manutenção Feita", "Observações", "Status"
+]
+ASSET_COLUMN = "Número de Patrimônio"
+# Rótulos dos diálogos que não coincidem com o nome da coluna
+FIELD_ALIASES = {"Data de Compra (DD/MM/YYYY)": "Data de Compra"}
+
+def normalize_details(details):
+    # Converte os campos de um diálogo em uma linha completa, na ordem de COLUMNS.
+    # Campos específicos (ex.: "Tamanho da Tela" dos monitores) são mantidos ao final.
+    row = {FIELD_ALIASES.get(label, label): value for label, value in details.items()}
+    extras = {label: value for label, value in row.items() if label not in COLUMNS}
+    return {**{column: row.get(column, "") for column in COLUMNS}, **extras}
+
+# Regras de validação dos diálogos, aplicadas por coluna a um DataFrame inteiro
+# (importações) ou a uma linha só (diálogos)
+REQUIRED_FIELDS = ["Número de Patrimônio", "Nome", "Setor"]
+DATE_FORMAT = "%d/%m/%Y"
+DISTINCT_SAMPLE = 5000
+
+def map_distinct(values, convert, missing):
+    # Aplica "convert" uma vez por valor distinto: datas, setores, RAM etc. se
+    # repetem muito, e o custo passa a depender dos valores distintos, não das linhas.
+    # Colunas quase sem repetição (ex.: Número de Patrimônio) são convertidas direto.
+    if len(values) > 2 * DISTINCT_SAMPLE and values.iloc[:DISTINCT_SAMPLE].nunique() > 0.9 * DISTINCT_SAMPLE:
+        return convert(values.astype(object))
+    codes, uniques = pd.factorize(values)
+    converted = np.asarray(convert(pd.Series(uniques, dtype=object)))
+    if codes.min(initial=0) >= 0 and np.array_equal(converted, uniques):
+        return values  # Nada mudou: evita copiar a coluna
+    return pd.Series(np.append(converted, missing)[codes], index=values.index)
+
+def display_value(value):
+    # Valor como exibido na tabela e digitado nos diálogos
+    if value is None or pd.isna(value):
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime(DATE_FORMAT)
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def as_entered(frame):
+    # Converte valores importados em texto, como os digitados nos diálogos
+    frame = frame.rename(columns=FIELD_ALIASES)
+    converted = {}
+    for column in frame.columns:
+        values = frame[column]
+        if pd.api.types.infer_dtype(values, skipna=False) == "string":
+            converted[column] = map_distinct(values, lambda uniques: uniques.str.strip(), "")
+        else:
+            converted[column] = map_distinct(values, lambda uniques: uniques.map(
+                lambda value: display_value(value).strip()), "")
+    return pd.DataFrame(converted, index=frame.index, columns=frame.columns)
+
+def missing_required(frame):
+    # Campos obrigatórios sem coluna no arquivo
+    present = {FIELD_ALIASES.get(label, label) for label in frame.columns}
+    return [column for column in REQUIRED_FIELDS if column not in present]
+
+def validate_frame(frame, keys=None):
+    # Retorna, para cada linha, a mensagem do primeiro campo inválido (None se válida).
+    # Espera texto (ver as_entered). Um campo obrigatório sem coluna no arquivo só é
+    # aceito nas linhas que atualizam itens existentes: "keys" são os Números de
+    # Patrimônio do inventário (None: todas as linhas incluem itens novos).
+    errors = pd.Series(np.full(len(frame), None, dtype=object), index=frame.index)
+
+    def mark(invalid, message):
+        invalid = invalid & errors.isna()
+        if invalid.any():
+            errors[invalid] = message
+
+    for label in frame.columns:
+        column = FIELD_ALIASES.get(label, label)
+        if column not in REQUIRED_FIELDS and column not in ("Data de Compra", "Memória RAM"):
+            continue
+        values = frame[label].astype(object)
+        empty = values.isna() | (values == "")
+        if column in REQUIRED_FIELDS:
+            mark(empty, f"O campo '{label}' é obrigatório.")
+        elif column == "Data de Compra":
+            dates = map_distinct(values.where(~empty), lambda uniques: pd.to_datetime(
+                uniques, format=DATE_FORMAT, errors="coerce"), np.datetime64("NaT"))
+            mark(~empty & dates.isna(), "Formato de data inválido (DD/MM/YYYY).")
+            mark(dates > pd.Timestamp.now(), "A data de compra não pode ser futura.")
+        elif column == "Memória RAM":
+            numbers = map_distinct(values.where(~empty), lambda uniques: pd.to_numeric(
+                uniques, errors="coerce"), np.nan)
+            mark(~empty & numbers.isna(), "Memória RAM deve ser um número.")
+    missing = missing_required(frame)
+    if missing:
+        if keys is None or ASSET_COLUMN not in frame.columns:
+            new = pd.Series(True, index=frame.index)
+        else:
+            new = ~frame[ASSET_COLUMN].isin(keys)
+        mark(new, f"O campo '{missing[0]}' é obrigatório.")
+    return errors
+
+def validation_error(details):
+    # Validação de um único registro (diálogos)
+    return validate_frame(pd.DataFrame([details])).iloc[0]
+
+def drop_duplicate_keys(frame):
+    # Um item por Número de Patrimônio, com a regra de upsert_frame nos dois
+    # modelos: a última ocorrência prevalece. Retorna (tabela, linhas descartadas).
+    repeated = frame[ASSET_COLUMN].duplicated(keep="last").to_numpy()
+    if not repeated.any():
+        return frame, 0
+    dropped = int(repeated.sum())
+    logging.warning(f"{dropped} linhas com Número de Patrimônio repetido descartadas (prevalece a última).")
+    return frame[~repeated], dropped
+
+def split_valid(frame, keys=None):
+    # Separa as linhas inválidas (quarentena), com o motivo na coluna "Erro"
+    errors = validate_frame(frame, keys)
+    invalid = errors.notna().to_numpy()
+    rejected = frame[invalid].copy()
+    rejected.insert(0, "Erro", errors[invalid].tolist())
+    return frame[~invalid], rejected
+
+# Esquema do inventário em memória: categorias para colunas com poucos valores
+# distintos, RAM numérica, datas como datetime64 e o texto livre no tipo "str"
+# do pandas 3 (Arrow), bem mais compacto que object. Valores que não puderem ser
+# convertidos sem perda mantêm a coluna como texto.
+CATEGORY_COLUMNS = ["Tipo", "Setor", "Status", "S.O.", "Processador"]
+NUMERIC_COLUMNS = ["Memória RAM"]
+DATE_COLUMNS = ["Data de Compra", "Última Manutenção Feita"]
+PANDAS_3 = int(version("pandas").split(".")[0]) >= 3
+TEXT_DTYPE = "str" if PANDAS_3 else object
+
+def typed_value(column, value):
+    # Um valor só (diálogos e diário), sem o custo de montar uma Series
+    if value is None or (isinstance(value, str) and not value) or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, str):
+        try:
+            if column in DATE_COLUMNS:
+                return pd.Timestamp(datetime.strptime(value, DATE_FORMAT))
+            if column in NUMERIC_COLUMNS:
+                return float(value)
+        except ValueError:
+            pass  # Fica como texto
+    return value
+
+def same_value(current, value):
+    # Compara o valor guardado com um já convertido por typed_value
+    if value is None:
+        return not isinstance(current, str) and pd.isna(current)
+    try:
+        return bool(current == value)
+    except (TypeError, ValueError):
+        return False
+
+def typed_values(column, values):
+    # Converte texto (diálogos, diário, importação) para o tipo da coluna;
+    # aceita um valor ou um array e retorna no mesmo formato
+    if np.ndim(values) == 0:
+        return typed_value(column, values)
+    series = pd.Series(values, dtype=object)
+    series = series.where(series.notna() & (series != ""), None)
+    if column in DATE_COLUMNS:
+        converted = map_distinct(series, lambda uniques: pd.to_datetime(
+            uniques, format=DATE_FORMAT, errors="coerce"), np.datetime64("NaT")).astype("datetime64[ns]")
+    elif column in NUMERIC_COLUMNS:
+        converted = map_distinct(series, lambda uniques: pd.to_numeric(uniques, errors="coerce"), np.nan).astype(float)
+    else:
+        converted = series
+    if converted.isna().sum() != series.isna().sum():
+        converted = series  # Algum valor não é data/número: fica como texto
+    return converted.to_numpy()
+
+def apply_schema(frame):
+    converted = {}
+    for column in frame.columns:
+        values = frame[column]
+        if column in CATEGORY_COLUMNS:
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                values = pd.Series(typed_values(column, values.to_numpy()), index=frame.index).astype("category")
+        elif column in DATE_COLUMNS or column in NUMERIC_COLUMNS:
+            if values.dtype == object or pd.api.types.is_string_dtype(values):
+                values = pd.Series(typed_values(column, values.to_numpy()), index=frame.index)
+                if values.dtype == object:
+                    values = values.astype(TEXT_DTYPE)
+        elif column in COLUMNS and values.dtype == object:
+            values = pd.Series(typed_values(column, values.to_numpy()), index=frame.index).astype(TEXT_DTYPE)
+        converted[column] = values
+    return pd.DataFrame(converted, index=frame.index, columns=frame.columns)
+
+def sort_ranks(series, column=None):
+    # Posto denso de cada valor para ordenação e o posto usado para vazios (sempre
+    # por último). Datas e números pelo valor; categorias e texto em ordem
+    # alfabética. Colunas de data/RAM que ficaram como texto ordenam pelo valor
+    # interpretado (DD/MM/YYYY ou número) e deixam o texto que não converte depois.
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series)
+    empty = np.zeros(len(uniques), dtype=bool)
+    if pd.api.types.is_datetime64_any_dtype(uniques) or (
+            pd.api.types.is_numeric_dtype(uniques) and not pd.api.types.is_bool_dtype(uniques)):
+        order = np.argsort(np.asarray(uniques), kind="stable")
+    else:
+        text = pd.Series(uniques)
+        if text.dtype == object:
+            # Valores mistos (ex.: datas que ficaram como texto, com datas editadas
+            # depois): o mesmo texto exibido tem um posto só
+            merged, uniques = pd.factorize(text.map(display_value))
+            codes = np.append(merged, -1)[codes]
+            text = pd.Series(uniques, dtype=object)
+        empty = (text == "").to_numpy()
+        order = text.argsort(kind="stable").to_numpy()
+        if column in DATE_COLUMNS or column in NUMERIC_COLUMNS:
+            if column in DATE_COLUMNS:
+                parsed = pd.to_datetime(text, format=DATE_FORMAT, errors="coerce")
+                value = parsed.fillna(pd.Timestamp(0)).to_numpy().astype(np.int64)
+            else:
+                parsed = pd.to_numeric(text, errors="coerce")
+                value = parsed.fillna(0).to_numpy(dtype=float)
+            text_rank = np.empty(len(uniques), dtype=np.int64)
+            text_rank[order] = np.arange(len(uniques))
+            order = np.lexsort((text_rank, value, parsed.isna().to_numpy()))
+    rank_of_unique = np.empty(len(uniques) + 1, dtype=np.int64)
+    rank_of_unique[order] = np.arange(len(uniques))
+    top = len(uniques)
+    rank_of_unique[:-1][empty] = top
+    rank_of_unique[-1] = top  # Código -1 (NaN/NaT) cai na última posição
+    return rank_of_unique[codes], top
+
 class ItemDialog(tk.Toplevel):
     # ... (Seu código ItemDialog permanece praticamente o mesmo)
     def __init__(self, parent, title, fields, item_data=None):
@@ -58,7 +426,8 @@ class ItemDialog(tk.Toplevel):
             entry.pack(pady=2, fill=tk.X)
             self.entries[label_text] = entry
             if self.item_data:
-                entry.insert(0, self.item_data.get(label_text, ''))
+                value = self.item_data.get(FIELD_ALIASES.get(label_text, label_text), '')
+                entry.insert(0, display_value(value))
 
         button_frame = tk.Frame(self)
         button_frame.pack(pady=10)
@@ -68,46 +437,12 @@ class ItemDialog(tk.Toplevel):
         cancel_button = tk.Button(button_frame, text="Cancelar", command=self.destroy)
         cancel_button.pack(side=tk.LEFT, padx=5)
 
-    def validate_date(self, date_str):
-        try:
-            datetime.strptime(date_str, "%d/%m/%Y")
-            return True
-        except ValueError:
-            return False
-
-    def is_number(self, value):
-        try:
-            float(value)
-            return True
-        except ValueError:
-            return False
-
     def on_add(self):
-        details = {}
-        for label, entry in self.entries.items():
-            value = entry.get().strip()
-            if label in ("Número de Patrimônio", "Nome", "Setor"):
-                if not value:
-                    messagebox.showerror("Erro", f"O campo '{label}' é obrigatório.")
-                    return
-            if label == "Data de Compra (DD/MM/YYYY)" and value:
-                if not self.validate_date(value):
-                    messagebox.showerror("Erro", "Formato de data inválido (DD/MM/YYYY).")
-                    return
-                try:
-                    purchase_date = datetime.strptime(value, "%d/%m/%Y")
-                    if purchase_date > datetime.now():
-                        messagebox.showerror("Erro", "A data de compra não pode ser futura.")
-                        return
-                except ValueError:
-                    messagebox.showerror("Erro", "Data inválida.")
-                    return
-            if label == "Memória RAM" and value:
-                if not self.is_number(value):
-                    messagebox.showerror("Erro", "Memória RAM deve ser um número.")
-                    return
-
-            details[label] = value
+        details = {label: entry.get().strip() for label, entry in self.entries.items()}
+        error = validation_error(details)
+        if error:
+            messagebox.showerror("Erro", error)
+            return
 
         self.add_item(details)
         self.destroy()
@@ -180,7 +515,2367 @@ class OtherItemDialog(ItemDialog):
         else:
             self.master.app.add_item_to_inventory(details)
 
+class SummaryPanel(tk.Toplevel):
+    # Resumo do inventário. Só exibe os agregados já mantidos pelo modelo
+    # (model.summary()), então abre e atualiza sem varrer a tabela.
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Resumo do Inventário")
+        self.geometry("420x520")
+        self.tree = ttk.Treeview(self, columns=("Quantidade",), show="tree headings")
+        self.tree.heading("#0", text="Indicador")
+        self.tree.heading("Quantidade", text="Quantidade")
+        self.tree.column("Quantidade", width=120, anchor=tk.E, stretch=tk.NO)
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+    def refresh(self, summary):
+        # Recria as linhas mantendo abertos os grupos que o usuário expandiu
+        expanded = {self.tree.item(item, "text") for item in self.tree.get_children() if self.tree.item(item, "open")}
+        self.tree.delete(*self.tree.get_children())
+        for name, value in summary.items():
+            if isinstance(value, list):
+                text = f"Por {name}"
+                group = self.tree.insert("", tk.END, text=text, values=(len(value),), open=text in expanded)
+                for label, count in value:
+                    self.tree.insert(group, tk.END, text=label or "(vazio)", values=(count,))
+            else:
+                self.tree.insert("", tk.END, text=name, values=(display_value(value),))
+
+class ExportDialog(tk.Toplevel):
+    # O que exportar: as linhas exibidas (filtro e ordenação atuais) ou o
+    # inventário inteiro, e quais colunas. self.result fica None se cancelado.
+    def __init__(self, parent, columns, filtered):
+        super().__init__(parent)
+        self.title("Exportar")
+        self.result = None
+
+        rows_frame = ttk.LabelFrame(self, text="Linhas", padding=10)
+        rows_frame.pack(padx=10, pady=5, fill=tk.X)
+        self.view_only = tk.BooleanVar(value=True)
+        ttk.Radiobutton(rows_frame, text="Itens exibidos na tabela" + (" (com o filtro atual)" if filtered else ""),
+                        variable=self.view_only, value=True).pack(anchor=tk.W)
+        ttk.Radiobutton(rows_frame, text="Inventário completo", variable=self.view_only, value=False).pack(anchor=tk.W)
+
+        columns_frame = ttk.LabelFrame(self, text="Colunas", padding=10)
+        columns_frame.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
+        self.selected = {column: tk.BooleanVar(value=True) for column in columns}
+        for column, variable in self.selected.items():
+            ttk.Checkbutton(columns_frame, text=column, variable=variable).pack(anchor=tk.W)
+
+        button_frame = tk.Frame(self)
+        button_frame.pack(pady=10)
+        tk.Button(button_frame, text="Exportar...", command=self.on_export).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Cancelar", command=self.destroy).pack(side=tk.LEFT, padx=5)
+        self.transient(parent)
+        self.grab_set()
+        self.focus_set()
+
+    def on_export(self):
+        columns = [column for column, variable in self.selected.items() if variable.get()]
+        if not columns:
+            messagebox.showerror("Erro", "Selecione ao menos uma coluna.", parent=self)
+            return
+        self.result = (self.view_only.get(), columns)
+        self.destroy()
+
+class DiagnosticsWindow(tk.Toplevel):
+    # Métricas de METRICS (tempos por trecho e contadores), atualizadas
+    # periodicamente enquanto a janela está aberta, com exportação em JSON e
+    # o liga/desliga do perfil com cProfile.
+    REFRESH_MS = 1000
+    SPAN_COLUMNS = ("Chamadas", "Total (ms)", "p50 (ms)", "p90 (ms)", "p99 (ms)", "Máx (ms)")
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Diagnóstico")
+        self.geometry("760x560")
+
+        button_frame = tk.Frame(self)
+        button_frame.pack(side=tk.TOP, fill=tk.X, pady=5)
+        tk.Button(button_frame, text="Atualizar", command=self.refresh).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Zerar", command=self.reset).pack(side=tk.LEFT, padx=5)
+        self.profile_button = tk.Button(button_frame, command=self.toggle_profile)
+        self.profile_button.pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Exportar JSON", command=self.export).pack(side=tk.LEFT, padx=5)
+        self.elapsed_label = tk.Label(button_frame, anchor=tk.E)
+        self.elapsed_label.pack(side=tk.RIGHT, padx=5)
+
+        self.profile_text = scrolledtext.ScrolledText(self, height=12, font=("Courier", 9))
+        self.profile_text.pack(side=tk.BOTTOM, fill=tk.X)
+
+        self.tree = ttk.Treeview(self, columns=self.SPAN_COLUMNS, show="tree headings")
+        self.tree.heading("#0", text="Trecho / contador")
+        self.tree.column("#0", width=220)
+        for column in self.SPAN_COLUMNS:
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=80, anchor=tk.E, stretch=tk.NO)
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.spans = self.tree.insert("", tk.END, text="Trechos", open=True)
+        self.counters = self.tree.insert("", tk.END, text="Contadores", open=True)
+
+        self.update_profile_button()
+        self.refresh()
+        self.schedule_refresh()
+
+    def schedule_refresh(self):
+        self.after(self.REFRESH_MS, self.auto_refresh)
+
+    def auto_refresh(self):
+        if self.winfo_exists():
+            self.refresh()
+            self.schedule_refresh()
+
+    def refresh(self):
+        report = METRICS.snapshot()
+        self.elapsed_label.config(text=f"Coletando há {report['segundos']:.0f} s")
+        self.tree.delete(*self.tree.get_children(self.spans), *self.tree.get_children(self.counters))
+        for name, stats in report["trechos"].items():
+            values = [stats["chamadas"]] + [f"{stats[key]:.2f}" for key in ("total_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms")]
+            self.tree.insert(self.spans, tk.END, text=name, values=values)
+        for name, value in report["contadores"].items():
+            self.tree.insert(self.counters, tk.END, text=name, values=(value,))
+
+    def reset(self):
+        METRICS.reset()
+        self.refresh()
+
+    def update_profile_button(self):
+        self.profile_button.config(text="Parar perfil" if METRICS.profiling else "Iniciar perfil")
+
+    def toggle_profile(self):
+        if not METRICS.profiling:
+            METRICS.start_profile()
+            self.profile_text.delete("1.0", tk.END)
+            self.profile_text.insert(tk.END, "Perfil em andamento: use o aplicativo e clique em \"Parar perfil\".")
+        else:
+            try:
+                text = METRICS.stop_profile()
+            except OSError as e:
+                messagebox.showerror("Erro", f"Erro ao gravar o perfil: {e}", parent=self)
+                text = ""
+            self.profile_text.delete("1.0", tk.END)
+            self.profile_text.insert(tk.END, f"Perfil completo gravado em {Metrics.PROFILE_FILE}\n{text}")
+            logging.info(f"Perfil gravado em: {Metrics.PROFILE_FILE}")
+        self.update_profile_button()
+
+    def export(self):
+        file_path = filedialog.asksaveasfilename(parent=self, defaultextension=".json",
+                                                 filetypes=[("JSON", "*.json")], initialdir=config.get("last_dir", "."))
+        if not file_path:
+            return
+        try:
+            METRICS.export(file_path)
+        except OSError as e:
+            messagebox.showerror("Erro", f"Erro ao exportar as métricas: {e}", parent=self)
+            return
+        logging.info(f"Métricas exportadas para: {file_path}")
+
+def fold(text):
+    # Minúsculas e sem acentos, para comparar nomes de coluna ("usuario" -> "Usuário")
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c)).lower()
+
+def parse_query(query, columns):
+    # "Setor:TI joao" -> [("Setor", "ti"), (None, "joao")]
+    try:
+        tokens = shlex.split(query)
+    except ValueError:
+        tokens = query.split()
+    names = {fold(str(column)): column for column in columns}
+    terms = []
+    for token in tokens:
+        name, sep, value = token.partition(":")
+        if sep and value:
+            matches = [column for key, column in names.items() if key.startswith(fold(name))]
+            if fold(name) in names or len(matches) == 1:
+                terms.append((names.get(fold(name), matches[0]), value.lower()))
+                continue
+        terms.append((None, token.lower()))
+    return terms
+
+def term_matches(column, value, text):
+    # Colunas de categoria casam pelo início do valor ("Setor:TI" não pega "Logística");
+    # as demais, em qualquer parte do texto
+    return text.startswith(value) if column in CATEGORY_COLUMNS else value in text
+
+def as_text(series):
+    # Texto como exibido na tabela (datas em DD/MM/YYYY, RAM sem ".0")
+    if pd.api.types.is_datetime64_any_dtype(series) or pd.api.types.is_float_dtype(series):
+        return map_distinct(series, lambda uniques: uniques.map(display_value), "").astype(str)
+    return series.astype(object).where(series.notna(), "").astype(str)
+
+def display_frame(frame):
+    # Cópia com datas e números formatados como na tabela, para exportação
+    converted = {column: as_text(frame[column]) if pd.api.types.is_datetime64_any_dtype(frame[column])
+                 or pd.api.types.is_float_dtype(frame[column]) else frame[column] for column in frame.columns}
+    return pd.DataFrame(converted, index=frame.index, columns=frame.columns)
+
+def display_rows(model, positions):
+    # Linhas da tabela como texto, na ordem de COLUMNS (a janela visível do VirtualTreeview)
+    rows = model.rows_at(positions).reindex(columns=COLUMNS).to_numpy().tolist()
+    return [[display_value(value) for value in row] for row in rows]
+
+def lowered(series):
+    return as_text(series).str.lower()
+
+def reference_days(frame):
+    # Dia da última manutenção ou, sem ela, da compra (inteiros; NaT = sem data)
+    days = None
+    for column in reversed(DATE_COLUMNS):
+        if column in frame.columns:
+            values = frame[column]
+            if not pd.api.types.is_datetime64_any_dtype(values):
+                values = pd.to_datetime(as_text(values), format=DATE_FORMAT, errors="coerce")
+            values = values.to_numpy().astype("datetime64[D]")
+            days = values if days is None else np.where(np.isnat(days), values, days)
+    if days is None:
+        days = np.full(len(frame), np.datetime64("NaT"), dtype="datetime64[D]")
+    return days.astype(np.int64)
+
+class SearchIndex:
+    # Índice de busca do inventário. Mantém em cache o texto de cada linha em
+    # minúsculas (todas as colunas concatenadas) e, sob demanda, cada coluna
+    # fatorada em códigos + valores distintos, para consultas como
+    # "Setor:TI Usuário:joao". Os caches são atualizados linha a linha.
+    SEPARATOR = "\x1f"
+    RECORD_SEPARATOR = "\x1e"
+    DIRECT_SCAN = 20000
+    MAX_STALE = 4096
+
+    def __init__(self, model):
+        self.model = model
+        self.reset()
+
+    def reset(self):
+        self.text = None
+        self.blob = None
+        self.stale = set()
+        self.columns = {}
+        self.last_terms = None
+        self.last_result = None
+
+    def row_text(self, values):
+        return self.SEPARATOR.join(display_value(value) for value in values).lower()
+
+    def join_text(self, columns, rows):
+        # Colunas já em minúsculas (ver lowered) -> texto de cada linha, juntado pelo
+        # pyarrow em C em vez de uma string por linha em Python
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        if not rows:
+            return np.array([], dtype=object)
+        arrays = [pa.array(values, type=pa.string()) for values in columns]
+        return pc.binary_join_element_wise(*arrays, self.SEPARATOR).to_numpy(zero_copy_only=False)
+
+    def frame_text(self, frame):
+        return self.join_text([lowered(frame[column]) for column in frame.columns], len(frame))
+
+    def ensure_text(self):
+        if self.text is None:
+            self.text = self.frame_text(self.model.frame)
+        return self.text
+
+    def ensure_blob(self):
+        # Todas as linhas em um único texto: str.find/str.count rodam em C e
+        # localizam consultas seletivas sem visitar cada linha em Python
+        if self.blob is None:
+            text = self.ensure_text()
+            offsets = [0]
+            offsets.extend(np.cumsum(np.fromiter(map(len, text), dtype=np.int64, count=len(text)) + 1).tolist())
+            self.blob = (self.RECORD_SEPARATOR.join(text), offsets)
+            self.stale = set()
+        return self.blob
+
+    def mark_stale(self, positions):
+        # Linhas alteradas depois de montado o blob: ele é mantido e essas linhas
+        # são reavaliadas pelo texto atual; só é descartado se acumular muitas
+        if self.blob is not None:
+            self.stale.update(positions)
+            if len(self.stale) > self.MAX_STALE:
+                self.blob = None
+                self.stale = set()
+
+    def contains(self, value, candidates):
+        text = self.ensure_text()
+        if len(candidates) > self.DIRECT_SCAN:
+            blob, offsets = self.ensure_blob()
+            found = np.zeros(len(text), dtype=bool)
+            hits = 0
+            start = blob.find(value)
+            while start != -1 and hits <= self.DIRECT_SCAN:
+                row = bisect.bisect_right(offsets, start) - 1
+                found[row] = True
+                hits += 1
+                start = blob.find(value, offsets[row + 1])
+            if start == -1:
+                for row in self.stale:
+                    found[row] = value in text[row]
+                return candidates[found[candidates]]
+        # Poucos candidatos ou consulta pouco seletiva: testa linha a linha
+        subset = text if len(candidates) == len(text) else text[candidates]
+        return candidates[np.fromiter((value in row for row in subset), dtype=bool, count=len(subset))]
+
+    def column_cache(self, column, values=None):
+        cache = self.columns.get(column)
+        if cache is None:
+            codes, uniques = pd.factorize(lowered(self.model.frame[column]) if values is None else values)
+            uniques = uniques.tolist()
+            cache = self.columns[column] = [codes, uniques, dict(zip(uniques, range(len(uniques))))]
+        return cache
+
+    def build(self):
+        # Todos os caches de uma vez, na thread de E/S que monta o inventário: a
+        # primeira busca na interface não paga a construção
+        frame = self.model.frame
+        columns = {column: lowered(frame[column]) for column in frame.columns}
+        if self.text is None:
+            self.text = self.join_text(list(columns.values()), len(frame))
+        for column, values in columns.items():
+            self.column_cache(column, values)
+        self.ensure_blob()
+        return self
+
+    def keep(self, text, columns, positions):
+        # Após a compactação do modelo: os caches anteriores (text, columns)
+        # continuam valendo para as linhas mantidas ("positions")
+        if text is not None:
+            self.text = text[positions]
+        for column, cache in columns.items():
+            if column in self.model.frame.columns:
+                cache[0] = cache[0][positions]
+                self.columns[column] = cache
+
+    def code(self, cache, value):
+        codes, uniques, lookup = cache
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(uniques)
+            uniques.append(value)
+        return code
+
+    def grow(self, count):
+        # Linhas reservadas (vazias) ao final de model.frame: os caches crescem junto
+        if self.text is not None:
+            self.text = np.concatenate([self.text, np.full(count, "", dtype=object)])
+        for cache in self.columns.values():
+            cache[0] = np.concatenate([cache[0], np.full(count, self.code(cache, ""), dtype=cache[0].dtype)])
+
+    def row_changed(self, position):
+        values = self.model.frame.iloc[position]
+        self.mark_stale([position])
+        if self.text is not None:
+            self.text[position] = self.row_text(values)
+        for column, cache in self.columns.items():
+            cache[0][position] = self.code(cache, display_value(values.get(column)).lower())
+        self.last_terms = self.last_result = None
+
+    def rows_changed(self, positions):
+        # Várias linhas de uma vez (extend/upsert_frame): só as posições tocadas são recalculadas
+        frame = self.model.frame.iloc[positions]
+        self.mark_stale(np.asarray(positions).tolist())
+        if self.text is not None:
+            self.text[positions] = self.frame_text(frame)
+        for column, cache in self.columns.items():
+            codes, uniques = pd.factorize(lowered(frame[column]))
+            mapping = np.fromiter((self.code(cache, value) for value in uniques), dtype=cache[0].dtype,
+                                  count=len(uniques))
+            cache[0][positions] = mapping[codes]
+        self.last_terms = self.last_result = None
+
+    def search(self, query, candidates=None):
+        # Retorna as posições (vivas) de self.model.frame que satisfazem todos os termos
+        terms = parse_query(query, self.model.frame.columns)
+        narrowing = candidates is None
+        if narrowing:
+            # Refinamento da consulta anterior (ex.: digitação): só reavalia os resultados dela
+            if self.last_terms is not None and len(terms) >= len(self.last_terms) and all(
+                    old_column == column and term_matches(column, old_value, value)
+                    for (old_column, old_value), (column, value) in zip(self.last_terms, terms)):
+                candidates = self.last_result
+            else:
+                candidates = self.model.live_positions()
+        for column, value in terms:
+            if not len(candidates):
+                break
+            if column is None:
+                candidates = self.contains(value, candidates)
+            else:
+                codes, uniques, lookup = self.column_cache(column)
+                hits = np.fromiter((term_matches(column, value, unique) for unique in uniques), dtype=bool,
+                                   count=len(uniques))
+                candidates = candidates[hits[codes[candidates]]]
+        if narrowing:
+            self.last_terms, self.last_result = terms, candidates
+        return candidates
+
+    def matches(self, position, query):
+        return len(self.search(query, np.array([position]))) > 0
+
+class InventoryStats:
+    # Agregados do painel de resumo: linhas por Setor/Tipo/Status, RAM total e
+    # linhas por data de referência da manutenção. São atualizados a cada
+    # inclusão, edição e exclusão (descontando a linha antiga e somando a nova)
+    # em vez de recalculados sobre a tabela inteira.
+    GROUP_COLUMNS = ["Setor", "Tipo", "Status"]
+    RAM_COLUMN = "Memória RAM"
+    COLUMNS = GROUP_COLUMNS + [RAM_COLUMN] + DATE_COLUMNS
+    NO_DATE = -2 ** 63  # NaT como inteiro
+    EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()  # Dias contados como no datetime64[D]
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.counts = {column: Counter() for column in self.GROUP_COLUMNS}
+        self.ram = 0.0
+        self.days = Counter()
+
+    def count(self, counter, values, weights, key=display_value):
+        codes, uniques = pd.factorize(values)
+        totals = np.bincount(codes + 1, weights=weights, minlength=len(uniques) + 1).astype(np.int64)
+        if totals[0]:
+            counter[key(None)] += int(totals[0])
+        for value, total in zip(uniques, totals[1:].tolist()):
+            counter[key(value)] += total
+
+    def update(self, frame, sign=1, weights=None):
+        # Soma (sign=1) ou desconta (sign=-1) as linhas de "frame"; "weights" conta
+        # cada linha mais de uma vez (resultados de GROUP BY)
+        weights = np.full(len(frame), sign, dtype=np.int64) if weights is None else np.asarray(weights) * sign
+        for column, counter in self.counts.items():
+            if column in frame.columns:
+                self.count(counter, frame[column], weights)
+        if self.RAM_COLUMN in frame.columns:
+            ram = frame[self.RAM_COLUMN]
+            if not pd.api.types.is_numeric_dtype(ram):
+                ram = pd.to_numeric(as_text(ram), errors="coerce")
+            self.ram += float(np.nansum(ram.to_numpy(dtype=float) * weights))
+        if any(column in frame.columns for column in DATE_COLUMNS):
+            self.count(self.days, reference_days(frame), weights, key=lambda day: self.NO_DATE if day is None else int(day))
+
+    def update_row(self, row, sign=1):
+        # Uma linha (dict) só, sem montar DataFrame: é o caso de cada inclusão,
+        # edição e exclusão pela interface
+        for column, counter in self.counts.items():
+            if column in row:
+                counter[display_value(row[column])] += sign
+        ram = typed_value(self.RAM_COLUMN, row.get(self.RAM_COLUMN))
+        if isinstance(ram, (int, float, np.number)) and not pd.isna(ram):
+            self.ram += sign * float(ram)
+        day = self.NO_DATE
+        for column in reversed(DATE_COLUMNS):
+            value = typed_value(column, row.get(column))
+            if isinstance(value, datetime):
+                day = value.toordinal() - self.EPOCH_ORDINAL
+                break
+        self.days[day] += sign
+
+    def summary(self, max_days):
+        # Dicionário pronto para exibição; "max_days" é o prazo da manutenção
+        cutoff = int((np.datetime64(datetime.now().date(), "D") - max_days).astype(np.int64))
+        groups = {column: sorted(((value, count) for value, count in counter.items() if count), key=lambda item: -item[1])
+                  for column, counter in self.counts.items()}
+        return {
+            "Itens": sum(self.counts[self.GROUP_COLUMNS[0]].values()),
+            **groups,
+            "Memória RAM total (GB)": self.ram,
+            "Manutenção vencida": sum(count for day, count in self.days.items() if day != self.NO_DATE and day < cutoff),
+            "Sem data de manutenção ou compra": self.days[self.NO_DATE],
+        }
+
+class InventoryModel:
+    persistent = False  # As alterações só chegam ao disco ao salvar
+
+    # Modelo do inventário, independente do Tk. Mantém um índice em memória
+    # Número de Patrimônio -> posição da linha em self.frame, então buscas,
+    # verificação de duplicidade e exclusões não varrem a coluna inteira.
+    # Exclusões apenas marcam a linha como removida (self.alive); a tabela é
+    # compactada quando as linhas removidas passam de uma fração do total.
+    # Inclusões usam linhas reservadas ao final de self.frame (self.size é o
+    # número de linhas em uso), que cresce por blocos proporcionais ao tamanho,
+    # em vez de um pd.concat a cada item.
+    # Ordenações não movem linhas: sorted_positions devolve as posições na ordem
+    # pedida a partir de permutações por coluna guardadas em self.sort_cache,
+    # descartadas quando a coluna é alterada.
+    # Uma coluna de texto "str" (Arrow) é imutável: gravar uma célula copia a
+    # coluna inteira. Na primeira edição avulsa ela passa a object (self.unpacked)
+    # e volta ao tipo compacto em pack, depois de um número de linhas gravadas
+    # proporcional ao tamanho, o que dilui a conversão como o buffer de inclusões.
+    COMPACT_RATIO = 0.25
+    COMPACT_MIN = 1024
+    GROWTH_RATIO = 0.25
+    GROWTH_MIN = 1024
+    PACK_RATIO = 0.25
+    PACK_MIN = 1024
+
+    def __init__(self, frame=None):
+        self.search_index = SearchIndex(self)
+        self.stats = InventoryStats()
+        self.load(pd.DataFrame(columns=COLUMNS) if frame is None else frame)
+
+    @timed("modelo.load")
+    def load(self, frame):
+        # Retorna quantas linhas repetidas foram descartadas
+        if ASSET_COLUMN not in frame.columns:
+            raise ValueError(f"Coluna '{ASSET_COLUMN}' não encontrada.")
+        frame, dropped = drop_duplicate_keys(frame)
+        self.frame = apply_schema(frame.reset_index(drop=True))
+        self.size = len(self.frame)
+        self.alive = np.ones(self.size, dtype=bool)
+        self.dead = 0
+        self.sort_cache = {}
+        self.unpacked = set()
+        self.written = 0  # Linhas gravadas desde que a primeira coluna passou a object
+        self.rebuild_index()
+        self.search_index.reset()
+        self.stats.clear()
+        self.stats.update(self.frame)
+        return dropped
+
+    def rebuild_index(self):
+        keys = self.frame[ASSET_COLUMN].iloc[:self.size].tolist()
+        self.index = dict(zip(keys, range(len(keys))))  # Sem repetições (ver load)
+
+    def __len__(self):
+        return self.size - self.dead
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def keys(self):
+        return self.index.keys()
+
+    def position(self, key):
+        return self.index.get(key)
+
+    def row(self, key):
+        return self.frame.iloc[self.index[key]].to_dict()
+
+    def live_positions(self):
+        return np.flatnonzero(self.alive) if self.dead else np.arange(self.size)
+
+    def live_frame(self):
+        frame = self.frame.iloc[:self.size] if self.size < len(self.frame) else self.frame
+        return frame[self.alive[:self.size]] if self.dead else frame
+
+    def rows_at(self, positions):
+        return self.frame.iloc[positions]
+
+    def sample(self, size):
+        frame = self.live_frame()
+        return frame.sample(size, random_state=0) if len(frame) > size else frame
+
+    @timed("modelo.search")
+    def search(self, query):
+        return self.search_index.search(query)
+
+    def matches(self, position, query):
+        return self.search_index.matches(position, query)
+
+    @contextmanager
+    def transaction(self):
+        yield
+
+    def reserve(self, count):
+        # Garante espaço para mais "count" linhas; as reservadas ficam vazias e fora de self.alive
+        missing = self.size + count - len(self.frame)
+        if missing <= 0:
+            return
+        extra = max(missing, self.GROWTH_MIN, int(len(self.frame) * self.GROWTH_RATIO))
+        block = self.frame.iloc[:0].reindex(range(extra))
+        self.frame = pd.concat([self.frame, block], ignore_index=True)
+        self.alive = np.append(self.alive, np.zeros(extra, dtype=bool))
+        self.search_index.grow(extra)
+
+    def ensure_columns(self, names):
+        for column in names:
+            if column not in self.frame.columns:
+                self.frame[column] = pd.Series(np.nan, index=self.frame.index, dtype=TEXT_DTYPE)
+
+    @timed("modelo.add")
+    def add(self, row):
+        self.reserve(1)
+        position = self.size
+        self.size += 1
+        self.sort_cache.clear()
+        self.ensure_columns(row)
+        for column, value in row.items():
+            self.set_value(position, column, value)
+        self.alive[position] = True
+        self.index[row[ASSET_COLUMN]] = position
+        self.search_index.row_changed(position)
+        self.stats.update_row(row)
+        self.count_written(1)
+        return position
+
+    @timed("modelo.extend")
+    def extend(self, rows):
+        # Inclui várias linhas de uma vez (ex.: ao reaplicar o diário ou importar)
+        added = pd.DataFrame(rows)
+        self.reserve(len(added))
+        positions = np.arange(self.size, self.size + len(added))
+        self.size += len(added)
+        self.sort_cache.clear()
+        self.ensure_columns(added.columns)
+        for column in added.columns:
+            self.set_value(positions, column, added[column].to_numpy())
+        self.alive[positions] = True
+        self.index.update(zip(added[ASSET_COLUMN].tolist(), positions.tolist()))
+        self.search_index.rows_changed(positions)
+        self.stats.update(self.frame.iloc[positions])
+
+    @timed("modelo.upsert_frame")
+    def upsert_frame(self, frame):
+        # Inclui ou atualiza um bloco de linhas pelo Número de Patrimônio (a última
+        # ocorrência prevalece); colunas ausentes no bloco não são alteradas.
+        # Retorna (incluídas, atualizadas).
+        frame = frame.drop_duplicates(ASSET_COLUMN, keep="last")
+        positions = np.fromiter((self.index.get(key, -1) for key in frame[ASSET_COLUMN]),
+                                dtype=np.int64, count=len(frame))
+        existing = positions >= 0
+        if existing.any():
+            self.ensure_columns(frame.columns)
+            self.stats.update(self.frame.iloc[positions[existing]], -1)
+            for column in frame.columns:
+                self.set_value(positions[existing], column, frame[column].to_numpy()[existing])
+            self.search_index.rows_changed(positions[existing])
+            self.stats.update(self.frame.iloc[positions[existing]])
+        if not existing.all():
+            self.extend(frame[~existing])
+        return int((~existing).sum()), int(existing.sum())
+
+    @timed("modelo.update")
+    def update(self, key, row):
+        position = self.index.pop(key)
+        self.ensure_columns(row)
+        self.stats.update_row(self.stats_row(position), -1)
+        for column, value in row.items():
+            self.set_value(position, column, value)
+        self.index[row[ASSET_COLUMN]] = position
+        self.search_index.row_changed(position)
+        self.stats.update_row(self.stats_row(position))
+        self.count_written(1)
+        return position
+
+    def stats_row(self, position):
+        # Só os campos usados pelo resumo, lidos célula a célula (sem montar uma Series)
+        return {column: self.frame.iat[position, self.frame.columns.get_loc(column)]
+                for column in InventoryStats.COLUMNS if column in self.frame.columns}
+
+    def set_value(self, position, column, value):
+        # "position" e "value" podem ser arrays (várias linhas da mesma coluna)
+        location = self.frame.columns.get_loc(column)
+        value = typed_values(column, value)
+        if np.ndim(position) == 0 and same_value(self.frame.iat[position, location], value):
+            return  # Edição que não muda o campo: evita a escrita e mantém a ordenação em cache
+        self.sort_cache.pop(column, None)
+        series = self.frame[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            if np.ndim(value) == 0:
+                new = [] if value is None or value in series.cat.categories else [value]
+            else:
+                new = pd.Index(pd.Series(value, dtype=object).dropna().unique()).difference(series.cat.categories)
+            if len(new):
+                self.frame[column] = series.cat.add_categories(new)
+        elif PANDAS_3 and np.ndim(position) == 0 and series.dtype == TEXT_DTYPE:
+            if not self.unpacked:
+                self.written = 0
+            self.frame[column] = series.astype(object)
+            self.unpacked.add(column)
+        del series  # Com uma referência à coluna o copy-on-write copiaria a coluna inteira na escrita
+        # iat é bem mais barato que iloc para uma célula só
+        cells = self.frame.iat if np.ndim(position) == 0 else self.frame.iloc
+        try:
+            cells[position, location] = value
+        except (TypeError, ValueError):
+            # Valor que não cabe no tipo da coluna (ex.: texto em uma coluna de datas)
+            self.frame[column] = self.frame[column].astype(object)
+            self.frame.iloc[position, location] = value
+
+    def count_written(self, rows):
+        self.written += rows
+        if self.unpacked and self.written >= max(self.PACK_MIN, self.PACK_RATIO * self.size):
+            self.pack()
+
+    @timed("modelo.pack")
+    def pack(self):
+        # Colunas de texto editadas voltam ao tipo compacto (as que receberam
+        # valores que não são texto ficam como object, como em set_value)
+        for column in self.unpacked:
+            values = self.frame[column]
+            if pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty"):
+                self.frame[column] = values.astype(TEXT_DTYPE)
+        self.unpacked.clear()
+        self.written = 0
+
+    @timed("modelo.delete")
+    def delete(self, key):
+        position = self.index.pop(key)
+        self.alive[position] = False
+        self.dead += 1
+        self.stats.update_row(self.stats_row(position), -1)
+        self.search_index.last_terms = self.search_index.last_result = None
+        return position
+
+    def needs_compaction(self):
+        return self.dead >= self.COMPACT_MIN and self.dead > self.COMPACT_RATIO * self.size
+
+    @timed("modelo.compact")
+    def compact(self):
+        # Retorna o mapa posição antiga -> posição nova (-1 para linhas removidas)
+        remap = np.cumsum(self.alive) - 1
+        remap[~self.alive] = -1
+        kept = self.live_positions()
+        text, columns = self.search_index.text, self.search_index.columns
+        self.load(self.live_frame())
+        self.search_index.keep(text, columns, kept)
+        return remap
+
+    def sort_entry(self, column):
+        # (postos, posto dos vazios, permutação crescente, quantidade de não vazios)
+        entry = self.sort_cache.get(column)
+        if entry is None:
+            ranks, top = sort_ranks(self.frame[column].iloc[:self.size], column)
+            order = np.argsort(ranks, kind="stable")
+            entry = self.sort_cache[column] = (ranks, top, order, int((ranks < top).sum()))
+        return entry
+
+    def sort_order(self, column, ascending):
+        ranks, top, order, filled = self.sort_entry(column)
+        if ascending:
+            return order
+        # Decrescente: inverte a permutação em O(n), mantendo os vazios no fim
+        return np.concatenate([order[:filled][::-1], order[filled:]])
+
+    def sort_key(self, column, ascending):
+        ranks, top, order, filled = self.sort_entry(column)
+        return ranks if ascending else np.where(ranks < top, top - 1 - ranks, top)
+
+    @timed("modelo.sorted_positions")
+    def sorted_positions(self, spec, positions=None):
+        # spec: [(coluna, crescente), ...] por prioridade; retorna as posições vivas
+        # (ou só as de "positions", ex.: resultado de um filtro) nessa ordem
+        if len(spec) == 1:
+            order = self.sort_order(*spec[0])
+        else:
+            keys = [self.sort_key(column, ascending) for column, ascending in spec]
+            spans = [self.sort_entry(column)[1] + 1 for column, ascending in spec]
+            if np.prod(spans, dtype=float) < 2 ** 62:
+                # Combina os postos em uma chave inteira só: mais rápido que o lexsort
+                combined = np.zeros(self.size, dtype=np.int64)
+                for key, span in zip(keys, spans):
+                    combined = combined * span + key
+                order = np.argsort(combined, kind="stable")
+            else:
+                order = np.lexsort(keys[::-1])
+        if positions is None:
+            keep = self.alive[order]
+        else:
+            keep = np.zeros(len(self.frame), dtype=bool)
+            keep[positions] = True
+            keep = keep[order]
+        return order[keep]
+
+    @timed("modelo.summary")
+    def summary(self):
+        return self.stats.summary(config.get("maintenance_days", MAINTENANCE_DAYS))
+
+    def memory_report(self):
+        # Bytes por coluna (linhas em uso) e o total, para comparar com a versão em object
+        usage = self.live_frame().memory_usage(index=False, deep=True)
+        return {**{str(column): int(size) for column, size in usage.items()}, "Total": int(usage.sum())}
+
+def quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+def sql_value(value):
+    if value is None or (not isinstance(value, (list, tuple, dict)) and pd.isna(value)):
+        return None
+    if isinstance(value, datetime):
+        return value.strftime(DATE_FORMAT)
+    if isinstance(value, (np.generic,)):
+        return value.item()
+    if isinstance(value, (str, int, float, bytes)):
+        return value
+    return str(value)
+
+class SQLiteInventory:
+    # Armazenamento opcional em SQLite, com a mesma interface do InventoryModel.
+    # Cada alteração vira um upsert/delete de uma linha (modo WAL), e filtros e
+    # ordenação são feitos em SQL: a memória usada é só a da lista de ids
+    # exibidos, não a do inventário. A "posição" de uma linha é o seu id.
+    persistent = True
+    TABLE = "inventario"
+    INDEXED_COLUMNS = ["Setor", "Tipo", "Status", "Usuário"]
+    MAX_IN_VALUES = 500
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.create_function("py_lower", 1, lambda value: None if value is None else str(value).lower(),
+                                        deterministic=True)
+        self.connection.create_function("py_busca", -1, lambda *values: self.search_text(values), deterministic=True)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.transaction_depth = 0
+        self.order_by = "ORDER BY id"
+        self.stats = None  # Agregados do resumo, montados com GROUP BY na primeira consulta
+        columns = ", ".join(
+            f"{quote(column)} {'NUMERIC' if column in NUMERIC_COLUMNS else 'TEXT'}"
+            for column in COLUMNS if column != ASSET_COLUMN)
+        with self.connection:
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.TABLE} (id INTEGER PRIMARY KEY, "
+                f"{quote(ASSET_COLUMN)} TEXT NOT NULL UNIQUE, {columns}, busca TEXT)")
+            for column in self.INDEXED_COLUMNS:
+                self.connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {quote('idx_' + column)} ON {self.TABLE} ({quote(column)})")
+        self.load_columns()
+
+    def load_columns(self):
+        info = self.connection.execute(f"PRAGMA table_info({self.TABLE})").fetchall()
+        self.columns = [row[1] for row in info if row[1] not in ("id", "busca")]
+
+    def ensure_columns(self, names):
+        # Campos específicos (ex.: "Tamanho da Tela") viram colunas novas
+        for name in names:
+            if name not in self.columns:
+                self.connection.execute(f"ALTER TABLE {self.TABLE} ADD COLUMN {quote(name)} TEXT")
+                self.columns.append(name)
+
+    @contextmanager
+    def transaction(self):
+        # Agrupa várias alterações em um único commit
+        self.transaction_depth += 1
+        try:
+            yield
+        except BaseException:
+            self.transaction_depth -= 1
+            if not self.transaction_depth:
+                self.connection.rollback()
+                self.stats = None
+            raise
+        self.transaction_depth -= 1
+        if not self.transaction_depth:
+            self.connection.commit()
+
+    def commit(self):
+        if not self.transaction_depth:
+            self.connection.commit()
+
+    def search_text(self, row):
+        return SearchIndex.SEPARATOR.join(display_value(value) for value in row).lower()
+
+    def to_frame(self, rows, columns):
+        return pd.DataFrame(rows, columns=columns) if rows else pd.DataFrame(columns=columns)
+
+    def select_columns(self):
+        return ", ".join(quote(column) for column in self.columns)
+
+    @timed("sqlite.load")
+    def load(self, frame):
+        if ASSET_COLUMN not in frame.columns:
+            raise ValueError(f"Coluna '{ASSET_COLUMN}' não encontrada.")
+        frame, dropped = drop_duplicate_keys(frame)
+        names = [str(column) for column in frame.columns]
+        self.stats = None
+        with self.transaction():
+            self.ensure_columns(names)
+            self.connection.execute(f"DELETE FROM {self.TABLE}")
+            placeholders = ", ".join("?" for _ in range(len(names) + 1))
+            statement = (f"INSERT INTO {self.TABLE} ({', '.join(quote(name) for name in names)}, busca) "
+                         f"VALUES ({placeholders})")
+            for start in range(0, len(frame), IO_CHUNK_ROWS):
+                chunk = frame.iloc[start:start + IO_CHUNK_ROWS]
+                self.connection.executemany(statement, (
+                    [sql_value(value) for value in row] + [self.search_text(row)]
+                    for row in chunk.itertuples(index=False)))
+        return dropped
+
+    def __len__(self):
+        return self.connection.execute(f"SELECT COUNT(*) FROM {self.TABLE}").fetchone()[0]
+
+    def __contains__(self, key):
+        return self.position(key) is not None
+
+    def keys(self):
+        return [key for (key,) in self.connection.execute(f"SELECT {quote(ASSET_COLUMN)} FROM {self.TABLE}")]
+
+    def position(self, key):
+        found = self.connection.execute(
+            f"SELECT id FROM {self.TABLE} WHERE {quote(ASSET_COLUMN)} = ?", (sql_value(key),)).fetchone()
+        return None if found is None else found[0]
+
+    def row(self, key):
+        found = self.connection.execute(
+            f"SELECT {self.select_columns()} FROM {self.TABLE} WHERE {quote(ASSET_COLUMN)} = ?",
+            (sql_value(key),)).fetchone()
+        if found is None:
+            raise KeyError(key)
+        return dict(zip(self.columns, found))
+
+    def ids(self, where="", params=()):
+        cursor = self.connection.execute(f"SELECT id FROM {self.TABLE} {where} {self.order_by}", params)
+        return np.fromiter((row[0] for row in cursor), dtype=np.int64)
+
+    def live_positions(self):
+        return self.ids()
+
+    def live_frame(self):
+        cursor = self.connection.execute(f"SELECT {self.select_columns()} FROM {self.TABLE} {self.order_by}")
+        return self.to_frame(cursor.fetchall(), self.columns)
+
+    def rows_at(self, positions):
+        ids = [int(position) for position in positions]
+        if not ids:
+            return pd.DataFrame(columns=self.columns)
+        cursor = self.connection.execute(
+            f"SELECT id, {self.select_columns()} FROM {self.TABLE} WHERE id IN ({', '.join('?' * len(ids))})", ids)
+        found = {row[0]: row[1:] for row in cursor}
+        return self.to_frame([found[i] for i in ids if i in found], self.columns)
+
+    def sample(self, size):
+        cursor = self.connection.execute(f"SELECT {self.select_columns()} FROM {self.TABLE} LIMIT ?", (size,))
+        return self.to_frame(cursor.fetchall(), self.columns)
+
+    def where(self, query):
+        clauses = []
+        params = []
+        for column, value in parse_query(query, self.columns):
+            if column is None:
+                clauses.append("instr(busca, ?) > 0")
+                params.append(value)
+                continue
+            if column in self.INDEXED_COLUMNS:
+                # Resolve a consulta nos valores distintos (lidos do índice) e usa IN,
+                # para que o SQLite filtre pelo índice em vez de varrer a tabela
+                values = [distinct for (distinct,) in self.connection.execute(
+                              f"SELECT DISTINCT {quote(column)} FROM {self.TABLE} WHERE {quote(column)} IS NOT NULL")
+                          if term_matches(column, value, str(distinct).lower())]
+                if len(values) <= self.MAX_IN_VALUES:
+                    clauses.append(f"{quote(column)} IN ({', '.join('?' * len(values))})" if values else "0")
+                    params.extend(values)
+                    continue
+            if column in CATEGORY_COLUMNS:
+                clauses.append(f"substr(py_lower({quote(column)}), 1, ?) = ?")
+                params.extend([len(value), value])
+            else:
+                clauses.append(f"instr(py_lower({quote(column)}), ?) > 0")
+                params.append(value)
+        return " AND ".join(clauses) or "1", params
+
+    @timed("sqlite.search")
+    def search(self, query):
+        clause, params = self.where(query)
+        return self.ids(f"WHERE {clause}", params)
+
+    def matches(self, position, query):
+        clause, params = self.where(query)
+        return self.connection.execute(
+            f"SELECT 1 FROM {self.TABLE} WHERE id = ? AND {clause}", [int(position)] + params).fetchone() is not None
+
+    def upsert_statement(self, names):
+        self.ensure_columns(names)
+        assignments = ", ".join(f"{quote(name)} = excluded.{quote(name)}" for name in names)
+        return (f"INSERT INTO {self.TABLE} ({', '.join(quote(name) for name in names)}, busca) "
+                f"VALUES ({', '.join('?' * (len(names) + 1))}) "
+                f"ON CONFLICT({quote(ASSET_COLUMN)}) DO UPDATE SET {assignments}, busca = excluded.busca")
+
+    def update_stats(self, old, new=None):
+        if self.stats is not None:
+            if old is not None:
+                self.stats.update_row(old, -1)
+            if new is not None:
+                self.stats.update_row(new)
+
+    def upsert(self, row):
+        if self.stats is not None:
+            key = row[ASSET_COLUMN]
+            self.update_stats(self.row(key) if key in self else None, row)
+        self.connection.execute(self.upsert_statement(list(row)),
+                                [sql_value(value) for value in row.values()] + [self.search_text(row.values())])
+        self.commit()
+        return self.position(row[ASSET_COLUMN])
+
+    @timed("sqlite.upsert_frame")
+    def upsert_frame(self, frame):
+        # Um bloco inteiro em uma transação. Retorna (incluídas, atualizadas).
+        before = len(self)
+        names = [str(column) for column in frame.columns]
+        self.stats = None
+        with self.transaction():
+            self.connection.executemany(self.upsert_statement(names), (
+                [sql_value(value) for value in row] + [self.search_text(row)]
+                for row in frame.itertuples(index=False)))
+            if any(column not in names for column in self.columns):
+                # Bloco com parte das colunas: recalcula a busca com a linha completa
+                self.connection.executemany(
+                    f"UPDATE {self.TABLE} SET busca = py_busca({self.select_columns()}) "
+                    f"WHERE {quote(ASSET_COLUMN)} = ?",
+                    ((sql_value(key),) for key in frame[ASSET_COLUMN]))
+        added = len(self) - before
+        return added, frame[ASSET_COLUMN].nunique() - added
+
+    @timed("sqlite.add")
+    def add(self, row):
+        return self.upsert(row)
+
+    @timed("sqlite.update")
+    def update(self, key, row):
+        position = self.position(key)
+        if position is None:
+            raise KeyError(key)
+        names = list(row)
+        self.ensure_columns(names)
+        self.update_stats(self.row(key) if self.stats is not None else None, row)
+        assignments = ", ".join(f"{quote(name)} = ?" for name in names)
+        self.connection.execute(
+            f"UPDATE {self.TABLE} SET {assignments}, busca = ? WHERE id = ?",
+            [sql_value(value) for value in row.values()] + [self.search_text(row.values()), position])
+        self.commit()
+        return position
+
+    @timed("sqlite.delete")
+    def delete(self, key):
+        position = self.position(key)
+        if position is None:
+            raise KeyError(key)
+        self.update_stats(self.row(key) if self.stats is not None else None)
+        self.connection.execute(f"DELETE FROM {self.TABLE} WHERE id = ?", (position,))
+        self.commit()
+        return position
+
+    def needs_compaction(self):
+        return False
+
+    @timed("sqlite.summary")
+    def summary(self):
+        if self.stats is None:
+            stats = InventoryStats()
+            for column in InventoryStats.GROUP_COLUMNS + [InventoryStats.RAM_COLUMN]:
+                if column in self.columns:
+                    rows = self.connection.execute(
+                        f"SELECT {quote(column)}, COUNT(*) FROM {self.TABLE} GROUP BY 1").fetchall()
+                    stats.update(self.to_frame([row[:1] for row in rows], [column]), weights=[row[1] for row in rows])
+            # Mesma regra do reference_days: a última manutenção ou, sem ela, a compra
+            last, purchase = (quote(column) for column in reversed(DATE_COLUMNS))
+            rows = self.connection.execute(
+                f"SELECT COALESCE(NULLIF({last}, ''), {purchase}), COUNT(*) FROM {self.TABLE} GROUP BY 1").fetchall()
+            stats.update(self.to_frame([row[:1] for row in rows], [DATE_COLUMNS[-1]]), weights=[row[1] for row in rows])
+            self.stats = stats
+        return self.stats.summary(config.get("maintenance_days", MAINTENANCE_DAYS))
+
+    @timed("sqlite.sorted_positions")
+    def sorted_positions(self, spec, positions=None):
+        terms = []
+        for column, ascending in spec:
+            name = quote(column)
+            key = name
+            if column in DATE_COLUMNS:
+                # Datas ficam como DD/MM/YYYY no banco: ordena por ano, mês e dia
+                key = f"substr({name}, 7, 4) || substr({name}, 4, 2) || substr({name}, 1, 2)"
+            # Vazios por último em qualquer direção
+            terms.append(f"({name} IS NULL OR {name} = ''), {key} {'ASC' if ascending else 'DESC'}")
+        self.order_by = "ORDER BY " + ", ".join(terms + ["id"])
+        order = self.ids()
+        return order if positions is None else order[np.isin(order, positions)]
+
+    def iter_frames(self):
+        cursor = self.connection.execute(f"SELECT {self.select_columns()} FROM {self.TABLE} {self.order_by}")
+        while True:
+            rows = cursor.fetchmany(IO_CHUNK_ROWS)
+            yield self.to_frame(rows, self.columns)
+            if len(rows) < IO_CHUNK_ROWS:
+                break
+
+    def close(self):
+        self.connection.close()
+
+class VirtualTreeview:
+    # Treeview virtualizada: apenas as linhas visíveis (mais uma pequena margem)
+    # existem no widget. O conteúdo de cada linha é buscado sob demanda através
+    # de fetch_rows(start, stop), então o custo de atualização não depende do
+    # tamanho do inventário.
+    OVERSCAN = 2
+    WHEEL_STEP = 3
+
+    def __init__(self, parent, columns, fetch_rows, key_column=0):
+        self.fetch_rows = fetch_rows
+        self.key_column = key_column
+        self.row_count = 0
+        self.first = 0
+        self.page_size = 1
+        self.rendered = []  # iids na ordem em que aparecem no widget
+        self.item_ids = {}  # Número de Patrimônio -> iid
+        self.item_keys = {}  # iid -> Número de Patrimônio
+        self.next_item_id = 0
+        self.selected_key = None
+
+        self.tree = ttk.Treeview(parent, columns=columns, show="headings", selectmode="browse")
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        # A barra vertical controla a posição virtual, não o widget em si
+        self.v_scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.yview)
+        self.v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.h_scrollbar = ttk.Scrollbar(parent, orient=tk.HORIZONTAL, command=self.tree.xview)
+        self.h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.tree.configure(xscrollcommand=self.h_scrollbar.set)
+
+        rowheight = ttk.Style().lookup("Treeview", "rowheight") or 0
+        self.row_height = int(rowheight) or tkfont.nametofont("TkDefaultFont").metrics("linespace") + 4
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-self.WHEEL_STEP))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(self.WHEEL_STEP))
+        self.tree.bind("<Up>", lambda event: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda event: self.move_selection(1))
+        self.tree.bind("<Prior>", lambda event: self.move_selection(-self.page_size))
+        self.tree.bind("<Next>", lambda event: self.move_selection(self.page_size))
+        self.tree.bind("<Home>", lambda event: self.move_selection(-self.row_count))
+        self.tree.bind("<End>", lambda event: self.move_selection(self.row_count))
+
+    def item_id(self, key):
+        iid = self.item_ids.get(key)
+        if iid is None:
+            iid = f"I{self.next_item_id}"
+            self.next_item_id += 1
+            self.item_ids[key] = iid
+            self.item_keys[iid] = key
+        return iid
+
+    def forget_key(self, key):
+        iid = self.item_ids.pop(key, None)
+        if iid is not None:
+            self.item_keys.pop(iid, None)
+        if key == self.selected_key:
+            self.selected_key = None
+
+    def set_row_count(self, count, dirty_keys=None):
+        self.row_count = count
+        self.render(dirty_keys)
+
+    def key_of(self, iid):
+        return self.item_keys.get(iid.split("#")[0])
+
+    def render(self, dirty_keys=()):
+        # Reconcilia a janela atual com as linhas desejadas: remove as que
+        # saíram, insere as novas e só reescreve valores das linhas "sujas".
+        # dirty_keys=None força a reescrita de todas as linhas visíveis.
+        with METRICS.span("tabela.render"):
+            self.reconcile(dirty_keys)
+
+    def reconcile(self, dirty_keys):
+        self.first = max(0, min(self.first, self.row_count - self.page_size))
+        stop = min(self.row_count, self.first + self.page_size + self.OVERSCAN)
+        with METRICS.span("tabela.buscar"):
+            rows = self.fetch_rows(self.first, stop) if stop > self.first else []
+
+        wanted = []
+        seen = set()
+        for values in rows:
+            key = values[self.key_column]
+            iid = self.item_id(key)
+            if iid in seen:
+                # Patrimônio duplicado (ex.: planilha importada): id local à janela
+                iid = f"{iid}#{len(wanted)}"
+            seen.add(iid)
+            wanted.append(iid)
+
+        tk_calls = 0
+        with METRICS.span("tabela.limpar"):
+            stale = [iid for iid in self.rendered if iid not in seen]
+            if stale:
+                self.tree.delete(*stale)
+                tk_calls += 1
+            current = [iid for iid in self.rendered if iid in seen]
+            present = set(current)
+
+        inserted = rewritten = 0
+        with METRICS.span("tabela.inserir"):
+            selected = []
+            for index, (iid, values) in enumerate(zip(wanted, rows)):
+                key = values[self.key_column]
+                if iid not in present:
+                    self.tree.insert("", index, iid=iid, values=values)
+                    current.insert(index, iid)
+                    inserted += 1
+                else:
+                    if current[index] != iid:
+                        self.tree.move(iid, "", index)
+                        current.remove(iid)
+                        current.insert(index, iid)
+                        tk_calls += 1
+                    if dirty_keys is None or key in dirty_keys:
+                        self.tree.item(iid, values=values)
+                        rewritten += 1
+                if key == self.selected_key:
+                    selected.append(iid)
+            self.rendered = current
+            if tuple(selected) != self.tree.selection():
+                self.tree.selection_set(selected)
+                tk_calls += 1
+            self.tree.yview_moveto(0)
+
+            if self.row_count:
+                self.v_scrollbar.set(self.first / self.row_count, min(1.0, (self.first + self.page_size) / self.row_count))
+            else:
+                self.v_scrollbar.set(0, 1)
+        # selection() + yview_moveto + barra de rolagem
+        METRICS.count("tk.chamadas", tk_calls + inserted + rewritten + 3)
+        METRICS.count("tabela.linhas_removidas", len(stale))
+        METRICS.count("tabela.linhas_inseridas", inserted)
+        METRICS.count("tabela.linhas_reescritas", rewritten)
+
+    def yview(self, *args):
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * self.row_count)
+            self.render()
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.page_size
+            self.scroll(amount)
+
+    def scroll(self, amount):
+        self.first += amount
+        self.render()
+        return "break"
+
+    def on_mousewheel(self, event):
+        step = event.delta // 120 if abs(event.delta) >= 120 else (1 if event.delta > 0 else -1)
+        return self.scroll(-step * self.WHEEL_STEP)
+
+    def on_resize(self, event):
+        # Desconta uma linha para o cabeçalho
+        page_size = max(1, event.height // self.row_height - 1)
+        if page_size != self.page_size:
+            self.page_size = page_size
+            self.render()
+
+    def on_select(self, event=None):
+        # Linhas que saem da área visível perdem a seleção no widget, mas a
+        # chave selecionada é mantida para reaplicar quando voltarem
+        selection = self.tree.selection()
+        if selection:
+            self.selected_key = self.key_of(selection[0])
+
+    def selected_index(self):
+        for offset, iid in enumerate(self.rendered):
+            if self.key_of(iid) == self.selected_key:
+                return self.first + offset
+        return None
+
+    def see(self, index):
+        if index < self.first:
+            self.first = index
+        elif index >= self.first + self.page_size:
+            self.first = index - self.page_size + 1
+        self.render()
+
+    def move_selection(self, delta):
+        if not self.row_count:
+            return "break"
+        index = self.selected_index()
+        if index is None:
+            index = self.first
+        else:
+            index = max(0, min(self.row_count - 1, index + delta))
+        self.see(index)
+        iid = self.rendered[index - self.first]
+        self.selected_key = self.key_of(iid)
+        self.tree.selection_set(iid)
+        self.tree.focus(iid)
+        return "break"
+
+class ColumnWidthEngine:
+    # Calcula a largura das colunas a partir do DataFrame, sem consultar o Tk
+    # célula por célula: só as strings mais longas de cada coluna são medidas,
+    # com uma única fonte e um cache LRU de larguras por texto.
+    PADDING = 20
+    CANDIDATES = 5
+    SAMPLE_SIZE = 50000
+    MEMO_SIZE = 4096
+
+    def __init__(self, columns, font="TkDefaultFont", heading_font=None):
+        self.columns = list(columns)
+        self.font = tkfont.nametofont(font) if isinstance(font, str) else tkfont.Font(font=font)
+        heading = tkfont.Font(font=heading_font) if heading_font else self.font
+        self.heading_widths = {column: heading.measure(column) for column in self.columns}
+        self.widths = {}
+        self.memo = OrderedDict()
+
+    def measure(self, text):
+        width = self.memo.get(text)
+        if width is None:
+            width = self.font.measure(text)
+            METRICS.count("tk.chamadas")
+            self.memo[text] = width
+            if len(self.memo) > self.MEMO_SIZE:
+                self.memo.popitem(last=False)
+        else:
+            self.memo.move_to_end(text)
+        return width
+
+    @timed("larguras.medir")
+    def compute(self, data):
+        # Recalcula todas as colunas; retorna as que mudaram de largura
+        if len(data) > self.SAMPLE_SIZE:
+            data = data.sample(self.SAMPLE_SIZE, random_state=0)
+        changed = {}
+        for column in self.columns:
+            width = self.heading_widths[column]
+            if column in data.columns and len(data):
+                text = as_text(data[column])
+                lengths = text.str.len().to_numpy()
+                count = min(self.CANDIDATES, len(lengths))
+                longest = np.argpartition(-lengths, count - 1)[:count]
+                width = max(width, max(self.measure(value) for value in text.to_numpy()[longest]))
+            if width != self.widths.get(column):
+                changed[column] = width
+            self.widths[column] = width
+        return changed
+
+    def update_row(self, row):
+        # Atualização incremental: uma linha nova/alterada só pode alargar colunas
+        changed = {}
+        for column in self.columns:
+            value = row.get(column, "")
+            width = self.measure(display_value(value))
+            if width > self.widths.get(column, self.heading_widths[column]):
+                self.widths[column] = changed[column] = width
+        return changed
+
+IO_CHUNK_ROWS = 5000
+
+class OperationCancelled(Exception):
+    pass
+
+def check_cancelled(cancelled):
+    if cancelled is not None and cancelled():
+        raise OperationCancelled()
+
+def report_progress(progress, done, total):
+    if progress is not None:
+        progress(done, total)
+
+@contextmanager
+def replacing(path):
+    # Escreve em um arquivo temporário e só substitui o destino se tudo der certo
+    temp_path = path + ".tmp"
+    try:
+        yield temp_path
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+CSV_BUFFER_BYTES = 1 << 20
+CSV_GZIP_LEVEL = 6  # O padrão do gzip (9) quase não reduz mais o arquivo e é bem mais lento
+
+def frame_chunks(frame):
+    # Sempre ao menos um bloco, para que o cabeçalho seja gravado
+    return (frame.iloc[start:start + IO_CHUNK_ROWS] for start in range(0, max(len(frame), 1), IO_CHUNK_ROWS))
+
+def write_csv(frame, path, progress=None, cancelled=None):
+    return write_csv_chunks(frame_chunks(frame), path, len(frame), progress, cancelled)
+
+def open_csv(path, compress=False):
+    # O buffer grande reduz as chamadas de escrita em disco
+    if compress:
+        return gzip.open(path, "wt", newline="", encoding="utf-8", compresslevel=CSV_GZIP_LEVEL)
+    return open(path, "w", newline="", encoding="utf-8", buffering=CSV_BUFFER_BYTES)
+
+@timed("io.write_csv_chunks")
+def write_csv_chunks(chunks, path, total=None, progress=None, cancelled=None):
+    done = 0
+    with replacing(path) as temp_path:
+        # ".csv.gz": compactado com gzip
+        with open_csv(temp_path, path.lower().endswith(".gz")) as f:
+            for number, chunk in enumerate(chunks):
+                check_cancelled(cancelled)
+                display_frame(chunk).to_csv(f, header=number == 0, index=False)
+                done += len(chunk)
+                report_progress(progress, done, max(total or 0, done))
+    return done
+
+def iter_view(source, positions, columns=None):
+    # Blocos de IO_CHUNK_ROWS linhas nas posições pedidas (ex.: a visão filtrada
+    # e ordenada da tabela), lidos só quando o bloco vai ser gravado, então a
+    # memória usada não depende do tamanho do inventário. source é uma cópia do
+    # DataFrame do modelo em memória (rasa no pandas 3, em que o Copy-on-Write só
+    # duplica as colunas alteradas durante a exportação; completa no pandas 2)
+    # ou o caminho de um banco SQLite, aberto numa conexão própria da thread que grava.
+    inventory = SQLiteInventory(source) if isinstance(source, str) else None
+    try:
+        for start in range(0, max(len(positions), 1), IO_CHUNK_ROWS):
+            part = positions[start:start + IO_CHUNK_ROWS]
+            if inventory is None:
+                chunk = source.iloc[part]
+            else:
+                chunk = pd.concat([inventory.rows_at(part[offset:offset + SQLiteInventory.MAX_IN_VALUES])
+                                   for offset in range(0, max(len(part), 1), SQLiteInventory.MAX_IN_VALUES)],
+                                  ignore_index=True)
+            yield chunk if columns is None else chunk.reindex(columns=columns)
+    finally:
+        if inventory is not None:
+            inventory.close()
+
+def write_excel(frame, path, progress=None, cancelled=None):
+    return write_excel_chunks(frame_chunks(frame), path, len(frame), progress, cancelled)
+
+@timed("io.write_excel_chunks")
+def write_excel_chunks(chunks, path, total=None, progress=None, cancelled=None):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    done = 0
+    for number, chunk in enumerate(chunks):
+        check_cancelled(cancelled)
+        if number == 0:
+            sheet.append([str(column) for column in chunk.columns])
+        for row in display_frame(chunk).itertuples(index=False):
+            sheet.append([None if pd.isna(value) else value for value in row])
+        done += len(chunk)
+        report_progress(progress, done, max(total or 0, done))
+    with replacing(path) as temp_path:
+        workbook.save(temp_path)
+    return done
+
+def asset_as_text(frame):
+    if ASSET_COLUMN in frame.columns:
+        # Equivalente a dtype=str no pd.read_excel: números de patrimônio são texto
+        frame[ASSET_COLUMN] = frame[ASSET_COLUMN].map(lambda value: value if value is None or isinstance(value, str) else str(value))
+    return frame
+
+def iter_excel(path, progress=None, cancelled=None):
+    # Lê a primeira planilha em blocos de IO_CHUNK_ROWS linhas (sempre ao menos um bloco)
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        total = max((sheet.max_row or 0) - 1, 0)
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        columns = [f"Unnamed: {number}" if name is None else str(name) for number, name in enumerate(header)]
+        chunk = []
+        done = 0
+        for row in rows:
+            if any(value is not None for value in row):
+                # Células vazias no fim da linha podem não vir no modo somente leitura
+                chunk.append(row[:len(columns)] + (None,) * (len(columns) - len(row)))
+            if len(chunk) == IO_CHUNK_ROWS:
+                check_cancelled(cancelled)
+                done += len(chunk)
+                yield asset_as_text(pd.DataFrame(chunk, columns=columns))
+                chunk = []
+                report_progress(progress, done, max(total, done))
+        report_progress(progress, done + len(chunk), max(total, done + len(chunk)))
+        yield asset_as_text(pd.DataFrame(chunk, columns=columns))
+    finally:
+        workbook.close()
+
+def read_excel(path, progress=None, cancelled=None):
+    return pd.concat(list(iter_excel(path, progress, cancelled)), ignore_index=True)
+
+@timed("io.import_excel")
+def import_excel(path, quarantine_path=None, progress=None, cancelled=None, snapshot=False):
+    # Importação pela interface: aplica as regras dos diálogos e grava as linhas
+    # inválidas, com o motivo, em quarentena. Retorna (válidas, rejeitadas).
+    # Com "snapshot", guarda também a cópia nativa usada para reabrir a planilha.
+    frame, rejected = split_valid(as_entered(read_excel(path, progress, cancelled)))
+    if quarantine_path and len(rejected):
+        write_csv(rejected, quarantine_path)
+    if snapshot:
+        write_snapshot(frame, path)
+    return frame, rejected
+
+def iter_csv(path, progress=None, cancelled=None):
+    # Tudo é lido como texto, como os valores digitados nos diálogos
+    # O andamento é medido em bytes lidos do arquivo
+    total = os.path.getsize(path)
+    with open(path, "rb") as f:
+        for chunk in pd.read_csv(f, dtype=str, keep_default_na=False, encoding="utf-8", chunksize=IO_CHUNK_ROWS):
+            check_cancelled(cancelled)
+            yield chunk
+            report_progress(progress, f.tell(), total)
+
+# Formato nativo: Arrow IPC (Feather v2) sem compressão, com colunas tipadas.
+# É aberto por mapeamento de memória, lendo do disco só as colunas pedidas.
+NATIVE_EXTENSION = ".feather"
+
+def arrow_table(frame):
+    import pyarrow as pa
+
+    arrays = {}
+    for column in frame.columns:
+        series = frame[column]
+        if column in NUMERIC_COLUMNS and not pd.api.types.is_numeric_dtype(series):
+            numeric = pd.to_numeric(series, errors="coerce")
+            # Só converte se todo valor preenchido for numérico, para não perder dados
+            if (numeric.notna() | series.isna() | (series.astype(str).str.strip() == "")).all():
+                series = numeric
+        if (pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series)
+                or isinstance(series.dtype, pd.CategoricalDtype) and series.cat.categories.inferred_type == "string"):
+            # Categorias são gravadas como colunas de dicionário
+            arrays[str(column)] = pa.array(series, from_pandas=True)
+            continue
+        try:
+            arrays[str(column)] = pa.array(series, type=pa.string(), from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Valores misturados (ex.: números vindos do Excel em uma coluna de texto)
+            series = series.astype(object).map(lambda value: None if pd.isna(value) else display_value(value))
+            arrays[str(column)] = pa.array(series, type=pa.string(), from_pandas=True)
+    return pa.table(arrays)
+
+@timed("io.write_native")
+def write_native(frame, path, progress=None, cancelled=None):
+    import pyarrow as pa
+
+    table = arrow_table(frame)
+    total = table.num_rows
+    done = 0
+    with replacing(path) as temp_path:
+        with pa.OSFile(temp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                for batch in table.to_batches(max_chunksize=IO_CHUNK_ROWS):
+                    check_cancelled(cancelled)
+                    writer.write_batch(batch)
+                    done += batch.num_rows
+                    report_progress(progress, done, total)
+
+def iter_native(path, columns=None, progress=None, cancelled=None):
+    # Um bloco por record batch (IO_CHUNK_ROWS linhas, como gravado por write_native)
+    import pyarrow as pa
+
+    with pa.memory_map(path, "r") as source:
+        reader = pa.ipc.open_file(source)
+        batches = [reader.get_batch(number) for number in range(reader.num_record_batches)]
+        if columns is not None:
+            columns = [column for column in columns if column in reader.schema.names]
+            batches = [batch.select(columns) for batch in batches]
+        if not batches:
+            yield pd.DataFrame(columns=reader.schema.names if columns is None else columns)
+            return
+        total = sum(batch.num_rows for batch in batches)
+        done = 0
+        for batch in batches:
+            check_cancelled(cancelled)
+            done += batch.num_rows
+            yield batch.to_pandas()
+            report_progress(progress, done, total)
+
+@timed("io.read_native")
+def read_native(path, columns=None, progress=None, cancelled=None):
+    return pd.concat(list(iter_native(path, columns, progress, cancelled)), ignore_index=True)
+
+class IOJob:
+    # Executa uma leitura/gravação em uma thread separada. A thread só atualiza
+    # atributos simples; a interface acompanha o andamento com root.after, já
+    # que o Tk não pode ser chamado fora da thread principal.
+    def __init__(self, target, *args):
+        self.target = target
+        self.args = args
+        self.progress = (0, 0)
+        self.result = None
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self.run)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def run(self):
+        try:
+            self.result = self.target(*self.args, progress=self.report, cancelled=self.cancel_event.is_set)
+        except Exception as e:
+            self.error = e
+
+    def report(self, done, total):
+        self.progress = (done, total)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def done(self):
+        return not self.thread.is_alive()
+
+    def wait(self):
+        self.thread.join()
+
+JOURNAL_FILE = "inventory.journal"
+AUTOSAVE_FILE = "autosave" + NATIVE_EXTENSION
+SNAPSHOT_FILE = "snapshot" + NATIVE_EXTENSION
+
+class ChangeJournal:
+    # Diário de alterações: uma linha JSON por inclusão, edição ou exclusão,
+    # identificada pelo Número de Patrimônio. A primeira linha indica o snapshot
+    # sobre o qual as operações são reaplicadas. As linhas ficam no buffer e o
+    # fsync é feito em lotes; ao salvar ou compactar, o diário recomeça do novo
+    # snapshot, de modo que cada gravação custa O(alterações).
+    FSYNC_BATCH = 64
+    COMPACT_ENTRIES = 1000
+
+    def __init__(self, path=JOURNAL_FILE):
+        self.path = path
+        self.file = None
+        self.header = None
+        self.entries = 0
+        self.pending = 0
+        self.generation = 0
+
+    def reset(self, base=None, current_file=None):
+        # Começa um diário vazio sobre o snapshot "base" (None = inventário vazio)
+        self.rewrite({"base": base, "file": current_file}, b"")
+
+    def rewrite(self, header, tail):
+        self.close()
+        with replacing(self.path) as temp_path:
+            with open(temp_path, "wb") as f:
+                f.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+                f.write(tail)
+                f.flush()
+                os.fsync(f.fileno())
+        self.file = open(self.path, "ab")
+        self.header = header
+        self.entries = tail.count(b"\n")
+        self.pending = 0
+        self.generation += 1
+
+    def record(self, op, key, row=None):
+        if self.file is None:
+            return
+        entry = {"op": op, "key": key}
+        if row is not None:
+            entry["row"] = row
+        self.file.write(json.dumps(entry, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+        self.entries += 1
+        self.pending += 1
+        if self.pending >= self.FSYNC_BATCH:
+            self.flush()
+
+    def flush(self):
+        if self.file is not None and self.pending:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.pending = 0
+
+    def mark(self):
+        # Posição do diário no momento em que uma cópia do inventário é tirada
+        self.flush()
+        return (self.generation, self.file.tell()) if self.file is not None else None
+
+    def compact(self, mark, base, current_file):
+        # O snapshot gravado contém tudo até "mark": só as operações feitas
+        # durante a gravação continuam no diário
+        if mark is None or mark[0] != self.generation:
+            return False
+        self.flush()
+        with open(self.path, "rb") as f:
+            f.seek(mark[1])
+            tail = f.read()
+        self.rewrite({"base": base, "file": current_file}, tail)
+        return True
+
+    def has_changes(self):
+        # Há alterações não salvas no diário ou só no snapshot automático
+        return bool(self.entries) or self.header is None or self.header["base"] != self.header["file"]
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def discard(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def read_journal(path):
+    with open(path, "rb") as f:
+        lines = f.read().split(b"\n")
+    header = json.loads(lines[0])
+    entries = []
+    for number, line in enumerate(lines[1:], start=2):
+        if not line.strip():
+            continue
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError:
+            # Última linha incompleta (queda durante a gravação): o resto é descartado
+            logging.warning(f"Diário de alterações truncado na linha {number}.")
+            break
+    return header, entries
+
+def replay_journal(model, entries):
+    pending = {}  # Inclusões e edições seguidas são aplicadas em bloco
+
+    def flush_pending():
+        if pending:
+            model.upsert_frame(pd.DataFrame(list(pending.values())))
+            pending.clear()
+
+    for entry in entries:
+        key = entry["key"]
+        if entry["op"] in ("add", "update") and entry["row"][ASSET_COLUMN] == key:
+            pending[key] = entry["row"]
+            continue
+        flush_pending()
+        if entry["op"] == "delete":
+            if key in model:
+                model.delete(key)
+        elif entry["op"] == "sort":
+            continue  # Diários antigos: a ordenação agora é só da visualização
+        elif key in model:
+            model.update(key, entry["row"])
+        else:
+            model.add(entry["row"])
+    flush_pending()
+    if model.needs_compaction():
+        model.compact()
+
+def snapshot_key(path):
+    stat = os.stat(path)
+    return {"file": os.path.abspath(path), "mtime": stat.st_mtime_ns, "size": stat.st_size}
+
+def write_snapshot(frame, path):
+    # Cópia nativa (já convertida e validada) da planilha "path": reabrir a mesma
+    # versão do arquivo não precisa ler e interpretar o XLSX de novo
+    info_path = SNAPSHOT_FILE + ".json"
+    try:
+        key = snapshot_key(path)
+        if os.path.exists(info_path):
+            os.remove(info_path)  # Sem a identificação, um snapshot pela metade nunca é usado
+        write_native(frame, SNAPSHOT_FILE)
+        with replacing(info_path) as temp_path:
+            with open(temp_path, "w") as f:
+                json.dump(key, f)
+    except OSError as e:
+        logging.error(f"Erro ao gravar o snapshot de {path}: {e}")
+
+@timed("io.read_spreadsheet")
+def read_spreadsheet(path, progress=None, cancelled=None):
+    # Linhas válidas da planilha, do snapshot quando ele é desta versão do arquivo
+    try:
+        with open(SNAPSHOT_FILE + ".json") as f:
+            cached = json.load(f) == snapshot_key(path)
+    except (OSError, ValueError):
+        cached = False
+    if cached:
+        return read_native(SNAPSHOT_FILE, progress=progress, cancelled=cancelled)
+    return import_excel(path, progress=progress, cancelled=cancelled, snapshot=True)[0]
+
+def open_last_inventory(path, progress=None, cancelled=None):
+    # Inicialização em segundo plano (importa o pandas fora da thread da interface).
+    # Para um banco SQLite retorna None: a conexão é aberta na thread da interface.
+    if path is None:
+        return InventoryModel()
+    if path.endswith(".db"):
+        importlib.import_module("pandas")
+        return None
+    if path.endswith(NATIVE_EXTENSION):
+        model = InventoryModel(read_native(path, progress=progress, cancelled=cancelled))
+    else:
+        model = InventoryModel(read_spreadsheet(path, progress, cancelled))
+    model.search_index.build()
+    return model
+
+def quarantine_file(path):
+    return os.path.splitext(path)[0] + ".quarentena.csv"
+
+def load_inventory_file(read, args, database=None, progress=None, cancelled=None):
+    # Carga pela interface, toda na thread de E/S: lê o arquivo com read(*args) e
+    # monta o InventoryModel (esquema, índices e resumo) ou, com "database", grava
+    # as linhas no banco SQLite por uma conexão desta thread. Retorna (modelo em
+    # memória ou None, linhas repetidas descartadas, linhas rejeitadas ou None)
+    result = read(*args, progress=progress, cancelled=cancelled)
+    frame, rejected = result if isinstance(result, tuple) else (result, None)
+    check_cancelled(cancelled)
+    if database is None:
+        model = InventoryModel()
+        dropped = model.load(frame)
+        model.search_index.build()
+        return model, dropped, rejected
+    inventory = SQLiteInventory(database)
+    try:
+        return None, inventory.load(frame), rejected
+    finally:
+        inventory.close()
+
+def recover_inventory(path, progress=None, cancelled=None):
+    # Reaplica o diário sobre o último snapshot; retorna (modelo, cabeçalho, operações)
+    header, entries = read_journal(path)
+    base = header.get("base")
+    if base is None:
+        frame = pd.DataFrame(columns=COLUMNS)
+    elif base.endswith(NATIVE_EXTENSION):
+        frame = read_native(base, progress=progress, cancelled=cancelled)
+    else:
+        frame = read_spreadsheet(base, progress, cancelled)
+    model = InventoryModel(frame)
+    replay_journal(model, entries)
+    model.search_index.build()
+    return model, header, entries
+
+# Importação de vários arquivos (um por setor): cada arquivo é lido e validado
+# em um processo separado (a leitura de .xlsx pelo openpyxl ocupa a CPU) e o
+# resultado é juntado pelo Número de Patrimônio.
+MERGE_CONFLICTS_FILE = "importacao.conflitos.csv"
+MERGE_QUARANTINE_FILE = "importacao.quarentena.csv"
+# Outros nomes de coluna usados nas planilhas dos setores (comparados sem acentos)
+COLUMN_SYNONYMS = {
+    "patrimonio": ASSET_COLUMN, "n patrimonio": ASSET_COLUMN, "numero do patrimonio": ASSET_COLUMN,
+    "memoria": "Memória RAM", "ram": "Memória RAM", "sistema operacional": "S.O.", "so": "S.O.",
+    "data da compra": "Data de Compra", "ultima manutencao": "Última Manutenção Feita",
+}
+
+def column_key(name):
+    return " ".join(fold(str(name)).replace(".", " ").replace("º", " ").split())
+
+def normalize_columns(frame):
+    # Ajusta os cabeçalhos ao esquema de COLUMNS (maiúsculas, acentos, espaços e
+    # sinônimos) e descarta colunas sem cabeçalho e sem dados
+    known = {column_key(name): FIELD_ALIASES.get(name, name) for name in COLUMNS + list(FIELD_ALIASES)}
+    known.update(COLUMN_SYNONYMS)
+    names = {}
+    for column in frame.columns:
+        target = known.get(column_key(column), column)
+        if target not in names.values() and target not in frame.columns.drop(column):
+            names[column] = target
+    frame = frame.rename(columns=names)
+    unnamed = [column for column in frame.columns if str(column).startswith("Unnamed: ")
+               and frame[column].isna().all()]
+    return frame.drop(columns=unnamed)
+
+def parse_inventory_file(path):
+    # Executada nos processos do pool: lê, normaliza e valida um arquivo inteiro
+    start = time.perf_counter()
+    frame = normalize_columns(pd.concat(list(iter_table(path)), ignore_index=True))
+    if ASSET_COLUMN not in frame.columns:
+        raise ValueError(f"Coluna '{ASSET_COLUMN}' não encontrada em {path}.")
+    frame = as_entered(frame)
+    # O processo não conhece o inventário: um campo obrigatório sem coluna no
+    # arquivo é verificado depois, na junção (ver reject_new_rows)
+    valid, rejected = split_valid(frame, keys=frame[ASSET_COLUMN])
+    return valid, rejected, time.perf_counter() - start
+
+def parse_inventory_files(paths, workers=None, progress=None, cancelled=None):
+    # Resultados na ordem de paths; os maiores arquivos são distribuídos primeiro
+    if workers is None:
+        workers = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    workers = max(1, min(len(paths), workers))
+    results = [None] * len(paths)
+    report_progress(progress, 0, len(paths))
+    if workers == 1:
+        for done, path in enumerate(paths, 1):
+            check_cancelled(cancelled)
+            results[done - 1] = parse_inventory_file(path)
+            report_progress(progress, done, len(paths))
+        return results
+    import concurrent.futures
+    import multiprocessing
+
+    def size(index):
+        try:
+            return os.path.getsize(paths[index])
+        except OSError:
+            return 0
+
+    # "spawn" também no Linux: o processo principal tem threads (Tk, log, E/S)
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(workers, mp_context=context) as pool:
+        futures = {pool.submit(parse_inventory_file, paths[index]): index
+                   for index in sorted(range(len(paths)), key=size, reverse=True)}
+        try:
+            for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                check_cancelled(cancelled)
+                results[futures[future]] = future.result()
+                report_progress(progress, done, len(paths))
+        except BaseException:
+            pool.shutdown(cancel_futures=True)
+            raise
+    return results
+
+def merge_frames(frames, paths):
+    # Junta os arquivos com o mesmo resultado de importá-los um após o outro
+    # (import_files): em cada item e coluna prevalece o último arquivo da lista que
+    # tem a coluna; as que nenhum arquivo do item traz ficam NaN e não são alteradas
+    # no inventário (ver upsert_merged). Repetições idênticas viram uma linha só;
+    # versões que divergem em alguma coluna em comum são conflitos e todas vão para
+    # o relatório, com os campos que diferem.
+    # Retorna (inventário juntado, conflitos, linhas duplicadas descartadas).
+    combined = pd.concat(frames, ignore_index=True)
+    combined.insert(0, "Arquivo", np.repeat(np.asarray(paths, dtype=object), [len(frame) for frame in frames]))
+    repeated = combined[combined[ASSET_COLUMN].duplicated(keep=False).to_numpy()]
+    data_columns = list(combined.columns[1:])
+    differing = repeated.groupby(ASSET_COLUMN, sort=False)[data_columns[1:]].nunique() > 1
+    differing = differing[differing.any(axis=1)]
+    conflicts = repeated[repeated[ASSET_COLUMN].isin(differing.index)].copy()
+    kept = ~conflicts[ASSET_COLUMN].duplicated(keep="last")
+    fields = {key: ", ".join(differing.columns[row]) for key, row in zip(differing.index, differing.to_numpy())}
+    conflicts.insert(0, "Campos divergentes", conflicts[ASSET_COLUMN].map(fields))
+    conflicts.insert(0, "Situação", np.where(kept, "mantida", "descartada"))
+    conflicts = conflicts.sort_values(ASSET_COLUMN, kind="stable")
+    merged = combined.groupby(ASSET_COLUMN, sort=False)[data_columns[1:]].last().reset_index()[data_columns]
+    duplicates = len(combined) - len(merged) - int((~kept).sum())
+    return merged, conflicts, duplicates
+
+def upsert_merged(inventory, merged):
+    # Um upsert_frame por conjunto de colunas preenchidas, para que as colunas que
+    # o arquivo do item não tinha (NaN) não apaguem os dados do inventário
+    added = updated = 0
+    if not len(merged):
+        return added, updated
+    patterns, groups = np.unique(merged.notna().to_numpy(), axis=0, return_inverse=True)
+    for number, pattern in enumerate(patterns):
+        part = merged.loc[groups.ravel() == number, merged.columns[pattern]]
+        part_added, part_updated = inventory.upsert_frame(part)
+        added += part_added
+        updated += part_updated
+    return added, updated
+
+def reject_new_rows(results, keys):
+    # Arquivos sem a coluna de um campo obrigatório só atualizam itens: na ordem
+    # dos arquivos, como em import_files, as linhas de itens que não estão no
+    # inventário nem foram incluídos por um arquivo anterior vão para a quarentena
+    known = set(keys)
+    for number, (valid, bad, seconds) in enumerate(results):
+        if missing_required(valid):
+            valid, new = split_valid(valid, known)
+            results[number] = (valid, pd.concat([bad, new], ignore_index=True), seconds)
+        known.update(valid[ASSET_COLUMN])
+    return results
+
+@timed("io.merge_inventory_files")
+def merge_inventory_files(paths, conflicts_path=None, quarantine_path=None, workers=None, keys=(),
+                          progress=None, cancelled=None):
+    # Retorna (inventário juntado, linhas rejeitadas, conflitos, totais); "keys"
+    # são os Números de Patrimônio já existentes no inventário
+    results = reject_new_rows(parse_inventory_files(paths, workers, progress, cancelled), keys)
+    merged, conflicts, duplicates = merge_frames([valid for valid, _, _ in results], paths)
+    rejected = []
+    for path, (_, bad, _) in zip(paths, results):
+        if len(bad):
+            bad.insert(0, "Arquivo", path)
+            rejected.append(bad)
+    rejected = pd.concat(rejected, ignore_index=True) if rejected else pd.DataFrame(columns=["Arquivo", "Erro"])
+    if quarantine_path and len(rejected):
+        write_csv(rejected, quarantine_path)
+    if conflicts_path and len(conflicts):
+        write_csv(conflicts, conflicts_path)
+    totals = {"arquivos": len(paths), "lidas": sum(len(valid) + len(bad) for valid, bad, _ in results),
+              "rejeitadas": len(rejected), "duplicadas": duplicates,
+              "conflitos": conflicts[ASSET_COLUMN].nunique() if len(conflicts) else 0, "itens": len(merged)}
+    logging.info(f"Importação de {len(paths)} arquivos: {totals} "
+                 f"(leitura: {sum(seconds for _, _, seconds in results):.1f} s somando os processos)")
+    return merged, rejected, conflicts, totals
+
+# Sincronização entre várias cópias do aplicativo. Um SyncServer (modo lote:
+#   python TECHWATCHPY.py servidor INVENTARIO [--endereco 127.0.0.1] [--porta 8765])
+# é o dono do inventário; cada InventoryApp conectado envia as próprias
+# alterações e recebe só as linhas alteradas desde a última troca.
+SYNC_PORT = 8765
+SYNC_TIMEOUT = 10  # Segundos por requisição
+SYNC_PENDING_FILE = "sincronizacao.pendente.json"
+
+def text_row(row):
+    return {column: display_value(value) for column, value in row.items()}
+
+class SyncRequestHandler(http.server.BaseHTTPRequestHandler):
+    #   GET  /alteracoes?epoca=...&desde=N  -> linhas alteradas após a versão N
+    #   POST /enviar {"epoca", "alteracoes"} -> versões aplicadas e conflitos
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path != "/alteracoes":
+            self.reply(404, {"erro": f"Caminho desconhecido: {url.path}"})
+            return
+        query = urllib.parse.parse_qs(url.query)
+        try:
+            since = int(query["desde"][0]) if "desde" in query else None
+            self.reply(200, self.server.pull(query.get("epoca", [None])[0], since))
+        except ValueError as e:
+            self.reply(400, {"erro": str(e)})
+        except sqlite3.Error as e:
+            self.reply(500, {"erro": str(e)})
+
+    def do_POST(self):
+        if self.path != "/enviar":
+            self.reply(404, {"erro": f"Caminho desconhecido: {self.path}"})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            self.reply(200, self.server.push(body.get("epoca"), body["alteracoes"]))
+        except (ValueError, KeyError, TypeError) as e:
+            self.reply(400, {"erro": f"Requisição inválida: {e}"})
+        except sqlite3.Error as e:
+            self.reply(500, {"erro": str(e)})
+
+    def reply(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} - {format % args}")
+
+class SyncServer(http.server.HTTPServer):
+    # Cada alteração aceita recebe a próxima versão global, guardada por Número
+    # de Patrimônio em self.versions (da mais antiga para a mais recente, então
+    # um pedido de "alterações desde N" só percorre as mais novas). Linhas que
+    # não mudaram desde a abertura do servidor têm versão 0.
+    # Cada alteração enviada traz a versão da linha em que o cliente se baseou
+    # (None para uma inclusão); se a linha mudou no servidor desde então a
+    # alteração é recusada como conflito e o cliente recebe a linha atual.
+    # A época identifica a numeração: sem o arquivo de versões, ou depois de um
+    # encerramento anormal (o arquivo de versões pode estar atrás do inventário),
+    # ela muda e os clientes recarregam o inventário inteiro.
+    # Num inventário nativo, regravado só a cada SAVE_SECONDS, cada alteração
+    # aceita vai antes para o diário (com fsync), antes da resposta ao cliente.
+    # As requisições são atendidas uma por vez, na thread que abriu o inventário.
+    SAVE_SECONDS = 30
+
+    def __init__(self, path, host="127.0.0.1", port=SYNC_PORT):
+        super().__init__((host, port), SyncRequestHandler)
+        self.inventory_path = path
+        self.versions_path = path + ".versoes.json"
+        self.journal_path = path + ".diario"
+        self.lock_path = path + ".trava"  # Existe enquanto o servidor está aberto
+        self.inventory = None
+        self.journal = None
+        self.epoch = uuid.uuid4().hex
+        self.version = 0
+        self.versions = OrderedDict()
+        self.deleted = set()
+        self.dirty = False
+        self.saved_at = time.monotonic()
+        self.ready = threading.Event()
+        self.error = None
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def run(self):
+        # O inventário é aberto na thread que atende as requisições (a conexão
+        # SQLite só pode ser usada na thread que a criou)
+        try:
+            self.inventory = open_inventory(self.inventory_path)
+            self.load_versions()
+            self.recover()
+        except Exception as e:
+            self.error = e
+            self.server_close()
+            raise
+        finally:
+            self.ready.set()
+        logging.info(f"Servidor de sincronização em {self.url}: {self.inventory_path} ({len(self.inventory)} itens, "
+                     f"versão {self.version})")
+        try:
+            self.serve_forever()
+        finally:
+            self.save(force=True)
+            if self.inventory.persistent:
+                self.inventory.close()
+            if not self.dirty:
+                # Tudo gravado: o próximo início é normal
+                if self.journal is not None:
+                    self.journal.discard()
+                os.remove(self.lock_path)
+            elif self.journal is not None:
+                self.journal.close()
+            self.server_close()
+            logging.info(f"Servidor de sincronização encerrado: {self.inventory_path}")
+
+    def start(self):
+        # Em segundo plano (testes e uso no mesmo computador)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def stop(self):
+        self.shutdown()
+        if self.thread is not None:
+            self.thread.join()
+
+    def load_versions(self):
+        try:
+            with open(self.versions_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.error(f"Arquivo de versões ilegível ({self.versions_path}); iniciando nova época: {e}")
+            return
+        self.epoch = state["epoca"]
+        self.version = state["versao"]
+        self.versions = OrderedDict(sorted(state["versoes"].items(), key=lambda item: item[1]))
+        self.deleted = set(state["excluidos"])
+
+    def recover(self):
+        # Encerramento anormal: reaplica o diário (inventário nativo) e começa uma nova época
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            header, entries = read_journal(self.journal_path)
+            replay_journal(self.inventory, entries)
+            replayed = len(entries)
+        if os.path.exists(self.lock_path):
+            self.epoch = uuid.uuid4().hex
+            self.dirty = True
+            logging.warning(f"O servidor de sincronização não foi encerrado normalmente: {replayed} alterações do "
+                            f"diário reaplicadas; nova época, os clientes recarregam o inventário.")
+        with open(self.lock_path, "w"):
+            pass
+        if not self.inventory.persistent:
+            self.journal = ChangeJournal(self.journal_path)
+            if replayed:
+                self.dirty = True
+                self.save(force=True)  # Grava o inventário com as alterações reaplicadas e esvazia o diário
+            else:
+                self.journal.reset(self.inventory_path, self.inventory_path)
+
+    def save(self, force=False):
+        # O inventário nativo é regravado por inteiro: no máximo a cada SAVE_SECONDS
+        if not self.dirty or (not force and time.monotonic() - self.saved_at < self.SAVE_SECONDS):
+            return
+        try:
+            if not self.inventory.persistent:
+                write_native(self.inventory.live_frame(), self.inventory_path)
+            with replacing(self.versions_path) as temp_path:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump({"epoca": self.epoch, "versao": self.version, "versoes": self.versions,
+                               "excluidos": sorted(self.deleted)}, f, ensure_ascii=False)
+        except OSError as e:
+            logging.error(f"Erro ao gravar o inventário sincronizado: {e}")
+            return
+        if self.journal is not None:
+            self.journal.reset(self.inventory_path, self.inventory_path)
+        self.dirty = False
+        self.saved_at = time.monotonic()
+
+    def service_actions(self):
+        # Chamado pelo serve_forever entre as requisições
+        self.save()
+
+    def row_version(self, key):
+        if key not in self.inventory:
+            return None
+        return self.versions.get(key, 0)
+
+    @timed("sincronizacao.pull")
+    def pull(self, epoch, since):
+        if epoch != self.epoch or since is None or since > self.version:
+            frame = as_entered(self.inventory.live_frame())
+            return {"epoca": self.epoch, "versao": self.version, "completo": True,
+                    "colunas": list(frame.columns), "linhas": frame.to_numpy().tolist(),
+                    "versoes": {key: changed_at for key, changed_at in self.versions.items() if key not in self.deleted}}
+        changed = []
+        for key, changed_at in reversed(self.versions.items()):
+            if changed_at <= since:
+                break
+            changed.append(key)
+        changed.reverse()
+        return {"epoca": self.epoch, "versao": self.version, "completo": False,
+                "linhas": [text_row(self.inventory.row(key)) for key in changed if key not in self.deleted],
+                "excluidos": [key for key in changed if key in self.deleted],
+                "versoes": {key: self.versions[key] for key in changed}}
+
+    @timed("sincronizacao.push")
+    def push(self, epoch, changes):
+        accepted = []
+        conflicts = []
+        with self.inventory.transaction():
+            for change in changes:
+                key = change["chave"]
+                current = self.row_version(key)
+                if epoch != self.epoch or change["base"] != current:
+                    conflicts.append({"chave": key, "op": change["op"], "linha": change.get("linha"),
+                                      "versao": current, "linha_servidor":
+                                      None if current is None else text_row(self.inventory.row(key))})
+                elif change["op"] == "delete":
+                    self.inventory.delete(key)
+                    accepted.append((key, True))
+                else:
+                    row = dict(change["linha"], **{ASSET_COLUMN: key})
+                    if current is None:
+                        self.inventory.add(row)
+                    else:
+                        self.inventory.update(key, row)
+                    accepted.append((key, False))
+        # As versões só avançam depois que o lote inteiro foi gravado
+        applied = {}
+        for key, deleted in accepted:
+            self.version += 1
+            self.versions[key] = applied[key] = self.version
+            self.versions.move_to_end(key)
+            if deleted:
+                self.deleted.add(key)
+            else:
+                self.deleted.discard(key)
+        if applied:
+            self.dirty = True
+            if self.journal is not None:
+                for key, deleted in accepted:
+                    if deleted:
+                        self.journal.record("delete", key)
+                    else:
+                        self.journal.record("update", key, text_row(self.inventory.row(key)))
+                self.journal.flush()  # A resposta só sai com as alterações no disco
+            if self.inventory.needs_compaction():
+                self.inventory.compact()
+        if conflicts:
+            logging.warning(f"Sincronização: {len(conflicts)} alterações recusadas por conflito: "
+                            f"{[conflict['chave'] for conflict in conflicts]}")
+        return {"epoca": self.epoch, "versao": self.version, "aplicadas": applied, "conflitos": conflicts}
+
+class SyncClient:
+    # Lado do InventoryApp. As alterações locais esperam em self.pending (uma
+    # por Número de Patrimônio, com a versão em que se basearam) até a próxima
+    # troca. exchange só faz as requisições e roda fora da thread do Tk; o
+    # estado é atualizado por apply/restore, na thread principal.
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+        self.epoch = None
+        self.version = None  # None: ainda sem cópia do inventário
+        self.versions = {}  # Ausente: versão 0 (linha inalterada desde a abertura do servidor)
+        self.pending = OrderedDict()
+
+    def request(self, path, payload=None):
+        data = None if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        request = urllib.request.Request(self.url + path, data=data,
+                                         headers={"Content-Type": "application/json; charset=utf-8"})
+        with urllib.request.urlopen(request, timeout=SYNC_TIMEOUT) as response:
+            return json.load(response)
+
+    def record(self, op, key, row=None):
+        if op == "update" and row[ASSET_COLUMN] != key:
+            # Troca de Número de Patrimônio: exclusão da chave antiga e inclusão da nova
+            self.record("delete", key)
+            self.record("add", row[ASSET_COLUMN], row)
+            return
+        previous = self.pending.pop(key, None)
+        if previous is not None:
+            base = previous["base"]
+        else:
+            base = None if op == "add" else self.versions.get(key, 0)
+        if op == "delete" and base is None:
+            return  # Incluída e excluída antes de chegar ao servidor
+        self.pending[key] = {"chave": key, "op": "delete" if op == "delete" else "upsert", "base": base,
+                             "linha": None if row is None else text_row(row)}
+
+    def take_pending(self):
+        changes = list(self.pending.values())
+        self.pending.clear()
+        return changes
+
+    def restore(self, changes):
+        # A troca falhou: as alterações voltam para a fila, antes das feitas nesse
+        # meio tempo (que herdam a versão base das anteriores)
+        newer = self.pending
+        self.pending = OrderedDict((change["chave"], change) for change in changes)
+        for key, change in newer.items():
+            if key in self.pending:
+                change["base"] = self.pending.pop(key)["base"]
+                if change["op"] == "delete" and change["base"] is None:
+                    continue
+            self.pending[key] = change
+
+    def exchange(self, changes, progress=None, cancelled=None):
+        pushed = self.request("/enviar", {"epoca": self.epoch, "alteracoes": changes}) if changes else None
+        query = {} if self.version is None else {"epoca": self.epoch, "desde": self.version}
+        pulled = self.request("/alteracoes?" + urllib.parse.urlencode(query))
+        return pushed, pulled
+
+    def apply(self, changes, pushed, pulled):
+        # Retorna (inventário completo ou None, linhas alteradas, chaves excluídas, conflitos)
+        rows = {}
+        deleted = set()
+        conflicts = []
+        if pushed is not None:
+            sent = {change["chave"]: change for change in changes}
+            for key, applied_at in pushed["aplicadas"].items():
+                self.versions[key] = applied_at
+                change = self.pending.get(key)
+                if change is not None:
+                    # Alterada de novo durante a troca: passa a se basear na versão aceita
+                    change["base"] = None if sent[key]["op"] == "delete" else applied_at
+            for conflict in pushed["conflitos"]:
+                # Prevalece a linha do servidor, inclusive sobre edições posteriores da mesma linha
+                key = conflict["chave"]
+                self.pending.pop(key, None)
+                if conflict["linha_servidor"] is None:
+                    self.versions.pop(key, None)
+                    deleted.add(key)
+                else:
+                    self.versions[key] = conflict["versao"]
+                    rows[key] = conflict["linha_servidor"]
+                conflicts.append(conflict)
+        self.epoch = pulled["epoca"]
+        self.version = pulled["versao"]
+        if pulled["completo"]:
+            self.versions = dict(pulled["versoes"])
+            frame = pd.DataFrame(pulled["linhas"], columns=pulled["colunas"])
+            return frame, [], [], conflicts
+        self.versions.update(pulled["versoes"])
+        for row in pulled["linhas"]:
+            rows[row[ASSET_COLUMN]] = row
+        for key in pulled["excluidos"]:
+            self.versions.pop(key, None)
+            rows.pop(key, None)
+            deleted.add(key)
+        # Alterações locais ainda não enviadas prevalecem na tela até a próxima troca
+        return (None, [row for key, row in rows.items() if key not in self.pending],
+                [key for key in deleted if key not in self.pending], conflicts)
+
+    def save_pending(self, path=SYNC_PENDING_FILE):
+        with replacing(path) as temp_path:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"servidor": self.url, "epoca": self.epoch, "alteracoes": list(self.pending.values())},
+                          f, ensure_ascii=False)
+
+    def load_pending(self, path=SYNC_PENDING_FILE):
+        # Alterações que não puderam ser enviadas ao fechar o aplicativo
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return 0
+        if state["servidor"] != self.url:
+            return 0
+        if state["epoca"] != self.epoch:
+            # As versões base não valem na numeração atual: o arquivo é mantido para conferência
+            logging.warning(f"Alterações pendentes em {path} pertencem a outra época do servidor; não reenviadas.")
+            return 0
+        self.restore(state["alteracoes"])
+        os.remove(path)
+        return len(state["alteracoes"])
+
 class InventoryApp:
+    FILTER_DELAY_MS = 300  # Espera após a última tecla antes de filtrar
+    IO_POLL_MS = 100
+    JOURNAL_FLUSH_MS = 1000  # Atraso máximo do fsync das alterações
+    AUTOSAVE_MS = 60000
+    SYNC_MS = 5000  # Intervalo entre trocas com o servidor de sincronização
+
     def __init__(self, root):
         self.root = root
         self.root.title("Inventário de TI")
@@ -192,30 +2887,66 @@ class InventoryApp:
         self.root.geometry(config["geometry"])
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
-        self.data = pd.DataFrame(columns=[
-            "Número de Patrimônio", "Tipo", "Nome", "Modelo", "Setor", "Usuário",
-            "Memória RAM", "S.O.", "Processador", "Data de Compra",
-            "Última Manutenção Feita", "Observações", "Status"
-        ])
+        # O inventário é aberto em segundo plano (recover_session/open_last_file):
+        # até lá a janela aparece com os controles desativados
+        self.model = None
+        self.view = None  # Posições de self.model.frame exibidas na tabela
+        self.active_filter = None
+        self.filter_job = None
+        self.io_job = None
+        self.batch_depth = 0
+        self.dirty_keys = set()
+        self.journal = ChangeJournal()
+        self.journal_job = None
+        self.autosave_job = None
+        self.summary_panel = None
+        self.diagnostics_window = None
+        self.sync = None  # SyncClient quando conectado a um servidor de sincronização
+        self.sync_job = None
+        self.sync_changes = []  # Alterações enviadas na troca em andamento
+        self.sync_failed = False
+        self.sort_spec = []  # [(coluna, crescente), ...] em ordem de prioridade
         self.create_widgets()
-        self.sort_order = {}
+        self.set_controls(tk.DISABLED)
         self.current_file = None # Adicionado para rastrear o arquivo aberto
+        self.recover_session()
+        self.root.after(self.AUTOSAVE_MS, self.autosave)
 
         self.root.app = self
         logging.info("Aplicativo iniciado.")
 
+    @property
+    def data(self):
+        return self.model.live_frame()
+
     def create_widgets(self):
-        menubar = tk.Menu(self.root)
+        self.menubar = menubar = tk.Menu(self.root)
         filemenu = tk.Menu(menubar, tearoff=0)
-        filemenu.add_command(label="Salvar", command=self.save_to_excel, accelerator="Ctrl+S")
-        filemenu.add_command(label="Carregar", command=self.load_from_excel)
+        filemenu.add_command(label="Salvar", command=self.save_inventory, accelerator="Ctrl+S")
+        filemenu.add_command(label="Salvar como...", command=lambda: self.save_inventory(save_as=True))
+        filemenu.add_command(label="Carregar", command=self.load_inventory)
+        filemenu.add_command(label="Abrir banco SQLite...", command=self.open_database)
+        filemenu.add_command(label="Conectar ao servidor de sincronização...", command=self.connect_sync_server)
+        filemenu.add_command(label="Desconectar do servidor", command=self.disconnect_sync)
+        filemenu.add_separator()
+        filemenu.add_command(label="Importar Excel", command=self.load_from_excel)
+        filemenu.add_command(label="Importar vários arquivos...", command=self.import_many_files)
+        filemenu.add_command(label="Exportar Excel", command=self.save_to_excel)
         filemenu.add_command(label="Exportar CSV", command=self.export_to_csv)
+        filemenu.add_command(label="Exportar seleção...", command=self.export_selection)
         filemenu.add_separator()
         filemenu.add_command(label="Sair", command=self.on_closing)
         menubar.add_cascade(label="Arquivo", menu=filemenu)
+        viewmenu = tk.Menu(menubar, tearoff=0)
+        viewmenu.add_command(label="Resumo do inventário", command=self.show_summary)
+        menubar.add_cascade(label="Exibir", menu=viewmenu)
+        # Fora de set_controls: o diagnóstico fica disponível durante a abertura
+        toolsmenu = tk.Menu(menubar, tearoff=0)
+        toolsmenu.add_command(label="Diagnóstico", command=self.show_diagnostics)
+        menubar.add_cascade(label="Ferramentas", menu=toolsmenu)
         self.root.config(menu=menubar)
 
-        self.root.bind("<Control-s>", self.save_to_excel)
+        self.root.bind("<Control-s>", self.save_inventory)
 
         button_frame = tk.Frame(self.root)
         button_frame.pack(pady=10)
@@ -224,10 +2955,10 @@ class InventoryApp:
         self.add_button.pack(side=tk.LEFT, padx=5)
         self.root.bind("<Control-n>", lambda event: self.show_item_type_dialog())
 
-        self.save_button = tk.Button(button_frame, text="Salvar Tabela", command=self.save_to_excel)
+        self.save_button = tk.Button(button_frame, text="Salvar Tabela", command=self.save_inventory)
         self.save_button.pack(side=tk.LEFT, padx=5)
 
-        self.load_button = tk.Button(button_frame, text="Carregar Tabela", command=self.load_from_excel)
+        self.load_button = tk.Button(button_frame, text="Carregar Tabela", command=self.load_inventory)
         self.load_button.pack(side=tk.LEFT, padx=5)
 
         filter_frame = tk.Frame(button_frame)
@@ -238,6 +2969,8 @@ class InventoryApp:
 
         self.filter_entry = tk.Entry(filter_frame)
         self.filter_entry.pack(side=tk.LEFT, padx=2)
+        self.filter_entry.bind("<KeyRelease>", self.schedule_filter)
+        self.filter_entry.bind("<Return>", lambda event: self.filter_items())
 
         self.filter_button = tk.Button(filter_frame, text="Filtrar", command=self.filter_items)
         self.filter_button.pack(side=tk.LEFT, padx=2)
@@ -251,30 +2984,48 @@ class InventoryApp:
         self.edit_button = tk.Button(button_frame, text="Editar Item", command=self.edit_item)
         self.edit_button.pack(side=tk.LEFT, padx=5)
 
+        self.summary_button = tk.Button(button_frame, text="Resumo", command=self.show_summary)
+        self.summary_button.pack(side=tk.LEFT, padx=5)
+
         frame = tk.Frame(self.root)
         frame.pack(pady=5, fill=tk.BOTH, expand=True)
 
-        self.tree = ttk.Treeview(frame, columns=list(self.data.columns), show="headings")
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-        v_scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.tree.yview)
-        v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.tree.configure(yscrollcommand=v_scrollbar.set)
-
-        h_scrollbar = ttk.Scrollbar(frame, orient=tk.HORIZONTAL, command=self.tree.xview)
-        h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
-        self.tree.configure(xscrollcommand=h_scrollbar.set)
+        self.table = VirtualTreeview(frame, COLUMNS, self.fetch_rows)
+        self.tree = self.table.tree
 
         for column in self.tree["columns"]:
             self.tree.heading(column, text=column, command=lambda col=column: self.sort_column(col))
             self.tree.column(column, width=150, stretch=tk.YES)  # Configuração inicial da largura
+        # Shift+clique no cabeçalho acrescenta a coluna como critério secundário
+        self.tree.bind("<Shift-Button-1>", self.on_shift_click)
+        self.column_widths = ColumnWidthEngine(self.tree["columns"], heading_font=('Arial', 10, 'bold'))
 
         self.status_bar = tk.Label(self.root, text="Pronto", bd=1, relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
 
-        self.progress_bar = Progressbar(self.root, orient=tk.HORIZONTAL, mode='indeterminate')
+        self.progress_frame = tk.Frame(self.root)
+        self.progress_bar = Progressbar(self.progress_frame, orient=tk.HORIZONTAL, mode='determinate')
+        self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.cancel_button = tk.Button(self.progress_frame, text="Cancelar", command=self.cancel_io_job)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+
+    def set_controls(self, state):
+        for widget in (self.add_button, self.save_button, self.load_button, self.filter_entry, self.filter_button,
+                       self.clear_filter_button, self.delete_button, self.edit_button, self.summary_button):
+            widget.configure(state=state)
+        for label in ("Arquivo", "Exibir"):
+            self.menubar.entryconfigure(label, state=state)
+
+    @timed("interface.on_model_ready")
+    def on_model_ready(self, model, file_path):
+        self.model = model
+        self.current_file = file_path
+        self.set_controls(tk.NORMAL)
+        self.update_treeview()
 
     def show_item_type_dialog(self):
+        if self.model is None:
+            return
         dialog = tk.Toplevel(self.root)
         dialog.title("Selecione o Tipo de Item")
         dialog.geometry("250x180")
@@ -299,21 +3050,77 @@ class InventoryApp:
         ttk.Button(button_frame, text="Outros", command=lambda: on_select("Outros")).pack(pady=5,fill = tk.X)
         dialog.wait_window()
 
+    @contextmanager
+    def batch_update(self):
+        # Agrupa várias alterações em uma única atualização da tabela
+        self.batch_depth += 1
+        try:
+            with self.model.transaction():
+                yield
+        finally:
+            self.batch_depth -= 1
+            if not self.batch_depth:
+                self.journal.flush()
+                self.flush_treeview()
+
+    def mark_dirty(self, *keys):
+        self.dirty_keys.update(keys)
+        if not self.batch_depth:
+            self.flush_treeview()
+
+    @timed("interface.flush_treeview")
+    def flush_treeview(self):
+        dirty, self.dirty_keys = self.dirty_keys, set()
+        self.table.set_row_count(len(self.view), dirty)
+        self.refresh_summary()
+
+    def record_change(self, op, key, row=None):
+        if self.sync is not None:
+            self.sync.record(op, key, row)
+            return  # Quem grava é o servidor de sincronização
+        if self.model.persistent:
+            return  # O banco SQLite já grava cada alteração
+        self.journal.record(op, key, row)
+        if self.journal.pending and self.journal_job is None:
+            self.journal_job = self.root.after(self.JOURNAL_FLUSH_MS, self.flush_journal)
+
+    def flush_journal(self):
+        self.journal_job = None
+        self.journal.flush()
+
+    def matches_filter(self, position):
+        if not self.active_filter:
+            return True
+        return self.model.matches(position, self.active_filter)
+
     def add_item_to_inventory(self, details):
-        if self.data["Número de Patrimônio"].isin([details["Número de Patrimônio"]]).any():
+        details = normalize_details(details)
+        asset_number = details[ASSET_COLUMN]
+        if asset_number in self.model:
             messagebox.showerror("Erro", "Número de Patrimônio já existe. Insira um valor único.")
             return
 
-        self.data = pd.concat([self.data, pd.DataFrame([details])], ignore_index=True)
-        self.update_treeview()
+        position = self.model.add(details)
+        self.record_change("add", asset_number, details)
+        if self.matches_filter(position):
+            self.view = np.append(self.view, position)
+        self.mark_dirty(asset_number)
+        self.apply_column_widths(self.column_widths.update_row(details))
         logging.info(f"Item adicionado: {details['Tipo']} - {details['Nome']}")
         self.update_status("Item adicionado com sucesso!")
 
     def update_item_in_inventory(self, asset_number, details):
-        index = self.data[self.data["Número de Patrimônio"] == asset_number].index[0]
-        if not index.empty:
-            self.data.loc[index[0]] = list(details.values())
-            self.update_treeview()
+        details = normalize_details(details)
+        if asset_number in self.model:
+            if details[ASSET_COLUMN] != asset_number and details[ASSET_COLUMN] in self.model:
+                messagebox.showerror("Erro", "Número de Patrimônio já existe. Insira um valor único.")
+                return
+            self.model.update(asset_number, details)
+            self.record_change("update", asset_number, details)
+            if details[ASSET_COLUMN] != asset_number:
+                self.table.forget_key(asset_number)
+            self.mark_dirty(details[ASSET_COLUMN])
+            self.apply_column_widths(self.column_widths.update_row(details))
             logging.info(f"Item atualizado: {details['Tipo']} - {details['Nome']}")
             self.update_status("Item atualizado com sucesso!")
         else:
@@ -324,9 +3131,8 @@ class InventoryApp:
     def edit_item(self):
         selected_item = self.tree.selection()
         if selected_item:
-            item_data = self.tree.item(selected_item)["values"]
-            asset_number = item_data[0]
-            item = self.data[self.data["Número de Patrimônio"] == asset_number].iloc[0].to_dict()
+            asset_number = self.table.selected_key
+            item = self.model.row(asset_number)
             item_type = item["Tipo"]
 
             if item_type == "Notebook":
@@ -340,34 +3146,78 @@ class InventoryApp:
         else:
             messagebox.showinfo("Aviso", "Selecione um item para editar.")
 
+    def fetch_rows(self, start, stop):
+        return display_rows(self.model, self.view[start:stop])
+
+    @timed("interface.update_treeview")
     def update_treeview(self):
-        self.tree.delete(*self.tree.get_children())
-        for row in self.data.to_numpy().tolist():
-            self.tree.insert("", "end", values=row)
+        self.view = self.sorted(None)
+        self.active_filter = None
+        self.dirty_keys.clear()
+        self.table.set_row_count(len(self.view), None)
         self.update_status("Tabela atualizada.")
         self.adjust_column_widths()
+        self.refresh_summary()
+
+    def show_summary(self):
+        if self.summary_panel is not None and self.summary_panel.winfo_exists():
+            self.summary_panel.lift()
+        else:
+            self.summary_panel = SummaryPanel(self.root)
+        self.refresh_summary()
+
+    def show_diagnostics(self):
+        if self.diagnostics_window is not None and self.diagnostics_window.winfo_exists():
+            self.diagnostics_window.lift()
+        else:
+            self.diagnostics_window = DiagnosticsWindow(self.root)
+
+    @timed("interface.refresh_summary")
+    def refresh_summary(self):
+        # Chamado a cada alteração: os agregados já estão atualizados no modelo
+        if self.summary_panel is None or not self.summary_panel.winfo_exists():
+            return
+        try:
+            self.summary_panel.refresh(self.model.summary())
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao calcular o resumo: {e}")
 
     def delete_item(self):
         selected_item = self.tree.selection()
         if selected_item:
             confirm = messagebox.askyesno("Confirmação", "Deseja realmente excluir o item?")
             if confirm:
-                item_data = self.tree.item(selected_item)["values"]
-                asset_number = item_data[0]
-                self.data = self.data[self.data["Número de Patrimônio"] != asset_number]
-                self.tree.delete(selected_item)
-                self.update_treeview()
+                asset_number = self.table.selected_key
+                position = self.model.delete(asset_number)
+                self.record_change("delete", asset_number)
+                self.view = self.view[self.view != position]
+                if self.model.needs_compaction():
+                    self.view = self.model.compact()[self.view]
+                self.table.forget_key(asset_number)
+                self.mark_dirty()
                 logging.info(f"Item excluído: {asset_number}")
                 messagebox.showinfo("Sucesso", "Item excluído com sucesso!")
                 self.update_status("Item excluído.")
         else:
             messagebox.showinfo("Aviso", "Selecione um item para excluir.")
 
+    def schedule_filter(self, event=None):
+        # Busca enquanto digita: só filtra quando a digitação pausa
+        if self.filter_job is not None:
+            self.root.after_cancel(self.filter_job)
+        self.filter_job = self.root.after(self.FILTER_DELAY_MS, self.run_scheduled_filter)
+
+    def run_scheduled_filter(self):
+        self.filter_job = None
+        if self.filter_entry.get().strip().lower() != (self.active_filter or ""):
+            self.filter_items()
+
+    @timed("interface.filter_items")
     def filter_items(self):
         filter_value = self.filter_entry.get().strip().lower()
         if filter_value:
-            filtered_data = self.data[self.data.apply(lambda row: any(filter_value in str(item).lower() for item in row), axis=1)]
-            self.update_treeview_with_data(filtered_data)
+            self.update_treeview_with_rows(self.sorted(self.model.search(filter_value)))
+            self.active_filter = filter_value
             self.update_status(f"Filtrando por: '{filter_value}'")
         else:
             self.update_treeview()
@@ -378,11 +3228,383 @@ class InventoryApp:
         self.update_treeview()
         self.update_status("Filtro removido.")
 
-    def update_treeview_with_data(self, data):
-        self.tree.delete(*self.tree.get_children())
-        for row in data.to_numpy().tolist():
-            self.tree.insert("", "end", values=row)
-        self.adjust_column_widths()
+    def update_treeview_with_rows(self, positions):
+        self.view = positions
+        self.dirty_keys.clear()
+        self.table.first = 0
+        self.table.set_row_count(len(self.view), None)
+
+    def run_io_job(self, message, error_message, target, args, on_success, on_error=None, unit="linhas"):
+        # Só uma operação de arquivo por vez; o resultado é tratado na thread principal
+        if self.io_job is not None:
+            messagebox.showwarning("Aviso", "Aguarde a conclusão da operação em andamento.")
+            return None
+        job = self.io_job = IOJob(target, *args).start()
+        self.start_progress()
+        self.root.after(self.IO_POLL_MS, self.poll_io_job, job, message, error_message, on_success, on_error, unit)
+        return job
+
+    def poll_io_job(self, job, message, error_message, on_success, on_error=None, unit="linhas"):
+        if job is not self.io_job:
+            return  # Operação já tratada (ex.: aguardada ao fechar o aplicativo)
+        done, total = job.progress
+        self.progress_bar.configure(maximum=max(total, 1), value=done)
+        # "unit" é o que o progresso conta: linhas ou, na importação de vários arquivos, arquivos
+        self.status_bar.config(text=f"{message} {done}/{total} {unit}")
+        if not job.done():
+            self.root.after(self.IO_POLL_MS, self.poll_io_job, job, message, error_message, on_success, on_error,
+                            unit)
+            return
+        self.io_job = None
+        self.stop_progress()
+        if job.error is not None and on_error is not None:
+            on_error(job.error)
+        if isinstance(job.error, OperationCancelled):
+            self.update_status("Operação cancelada.")
+        elif isinstance(job.error, FileNotFoundError):
+            logging.error("Arquivo não encontrado.")
+            messagebox.showerror("Erro", "Arquivo não encontrado.")
+            self.update_status("Arquivo não encontrado.")
+        elif job.error is not None:
+            logging.error(f"{error_message}: {job.error}")
+            messagebox.showerror("Erro", f"{error_message}: {job.error}")
+            self.update_status(f"{error_message}.")
+        else:
+            on_success(job.result)
+
+    def cancel_io_job(self):
+        if self.io_job is not None:
+            self.io_job.cancel()
+
+    def recover_session(self):
+        # Um diário com alterações indica que a última sessão não terminou normalmente
+        if not os.path.exists(self.journal.path):
+            self.open_last_file()
+            return
+
+        def on_success(result):
+            model, header, entries = result
+            self.on_model_ready(model, header.get("file"))
+            self.journal.rewrite(header, b"".join(
+                json.dumps(entry, ensure_ascii=False, default=str).encode("utf-8") + b"\n" for entry in entries))
+            logging.info(f"Sessão recuperada: {len(entries)} alterações reaplicadas sobre {header.get('base')}")
+            self.update_status(f"Sessão anterior recuperada ({len(entries)} alterações não salvas).")
+
+        def on_error(error):
+            # Preserva o diário que não pôde ser reaplicado e começa um novo
+            failed_path = self.journal.path + ".falha"
+            os.replace(self.journal.path, failed_path)
+            logging.error(f"Diário de alterações movido para {failed_path}")
+            self.open_last_file()
+
+        self.run_io_job("Recuperando...", "Erro ao recuperar a sessão anterior",
+                        recover_inventory, (self.journal.path,), on_success, on_error)
+
+    def open_last_file(self):
+        # Reabre em segundo plano o último inventário usado (planilhas pelo snapshot)
+        file_path = config.get("last_file")
+        if file_path and not os.path.exists(file_path):
+            file_path = None
+
+        def on_success(model):
+            if model is None:
+                try:
+                    model = SQLiteInventory(file_path)
+                except sqlite3.Error as e:
+                    on_error(e)
+                    messagebox.showerror("Erro", f"Erro ao abrir o banco: {e}")
+                    return
+            self.on_model_ready(model, file_path)
+            if model.persistent:
+                self.journal.discard()
+            else:
+                self.journal.reset(file_path, file_path)
+            if file_path:
+                self.update_status(f"Tabela carregada de: {file_path}")
+
+        def on_error(error):
+            # Começa com um inventário vazio; o erro é informado por poll_io_job
+            logging.error(f"Erro ao reabrir {file_path}: {error}")
+            self.on_model_ready(InventoryModel(), None)
+            self.journal.reset()
+
+        self.run_io_job("Abrindo...", "Erro ao abrir o último inventário",
+                        open_last_inventory, (file_path,), on_success, on_error)
+
+    def connect_sync_server(self):
+        url = askstring("Sincronização", "Endereço do servidor:", parent=self.root,
+                        initialvalue=config.get("sync_url", f"http://127.0.0.1:{SYNC_PORT}"))
+        if not url:
+            return
+        if (self.sync is None and not self.model.persistent and self.journal.has_changes()
+                and not messagebox.askyesno("Confirmação", "As alterações não salvas serão descartadas. Continuar?")):
+            return
+        client = SyncClient(url.strip())
+
+        def on_success(result):
+            if self.sync is not None:
+                self.disconnect_sync()
+            frame = client.apply([], *result)[0]
+            if self.model.persistent:
+                self.model.close()
+            self.model = InventoryModel(frame)
+            self.sync = client
+            self.sync_failed = False
+            self.journal.discard()
+            self.current_file = None
+            self.table.first = 0
+            self.update_treeview()
+            pending = client.load_pending()
+            logging.info(f"Conectado ao servidor de sincronização {client.url} (versão {client.version})")
+            self.update_status(f"Conectado a {client.url}: {len(self.model)} itens"
+                               + (f", {pending} alterações pendentes reenviadas." if pending else "."))
+            config["sync_url"] = client.url
+            save_config(config)
+            self.root.after(self.SYNC_MS, self.sync_tick, client)
+
+        self.run_io_job("Conectando...", "Erro ao conectar ao servidor de sincronização",
+                        client.exchange, ([],), on_success)
+
+    def sync_tick(self, client):
+        if client is not self.sync:
+            return  # Desconectado (ou conectado a outro servidor) desde o agendamento
+        self.root.after(self.SYNC_MS, self.sync_tick, client)
+        if self.sync_job is not None or self.batch_depth:
+            return
+        self.sync_changes = client.take_pending()
+        job = self.sync_job = IOJob(client.exchange, self.sync_changes).start()
+        self.root.after(self.IO_POLL_MS, self.poll_sync, job, client)
+
+    def poll_sync(self, job, client):
+        if job is not self.sync_job:
+            return
+        if not job.done():
+            self.root.after(self.IO_POLL_MS, self.poll_sync, job, client)
+            return
+        self.sync_job = None
+        changes, self.sync_changes = self.sync_changes, []
+        if job.error is not None:
+            client.restore(changes)
+            if not self.sync_failed:
+                logging.error(f"Erro na sincronização com {client.url}: {job.error}")
+            self.sync_failed = True
+            self.update_status(f"Servidor de sincronização indisponível; {len(client.pending)} alterações pendentes.")
+            return
+        if self.sync_failed:
+            logging.info(f"Sincronização com {client.url} restabelecida.")
+            self.sync_failed = False
+        self.apply_sync(*client.apply(changes, *job.result))
+
+    def apply_sync(self, frame, rows, deleted, conflicts):
+        if frame is not None:
+            # O servidor trocou de época: recarrega o inventário inteiro
+            self.model.load(frame)
+            self.update_treeview()
+        elif rows or deleted:
+            with self.batch_update():
+                for row in rows:
+                    self.apply_remote_row(row)
+                for key in deleted:
+                    self.remove_remote_row(key)
+            self.update_status(f"Sincronizado: {len(rows)} itens recebidos, {len(deleted)} excluídos.")
+        if conflicts:
+            for conflict in conflicts:
+                logging.warning(f"Conflito de sincronização em {conflict['chave']}: alteração local descartada "
+                                f"({conflict['op']}: {json.dumps(conflict['linha'], ensure_ascii=False)})")
+            keys = ", ".join(str(conflict["chave"]) for conflict in conflicts[:10])
+            messagebox.showwarning("Conflito", f"{len(conflicts)} alterações foram recusadas porque outro usuário "
+                                               f"alterou os mesmos itens ({keys}). A versão do servidor foi mantida; "
+                                               f"as alterações recusadas estão em {LOG_FILE}.")
+
+    def apply_remote_row(self, row):
+        key = row[ASSET_COLUMN]
+        if key in self.model:
+            self.model.update(key, row)
+        else:
+            position = self.model.add(row)
+            if self.matches_filter(position):
+                self.view = np.append(self.view, position)
+        self.mark_dirty(key)
+        self.apply_column_widths(self.column_widths.update_row(row))
+
+    def remove_remote_row(self, key):
+        if key not in self.model:
+            return
+        position = self.model.delete(key)
+        self.view = self.view[self.view != position]
+        if self.model.needs_compaction():
+            self.view = self.model.compact()[self.view]
+        self.table.forget_key(key)
+        self.mark_dirty()
+
+    def disconnect_sync(self):
+        # Conclui a troca em andamento e envia o que ficou pendente; o inventário
+        # continua aberto localmente, como um arquivo novo
+        client = self.sync
+        if client is None:
+            return
+        if self.sync_job is not None:
+            self.sync_job.wait()
+            self.poll_sync(self.sync_job, client)
+        self.sync = None
+        changes = client.take_pending()
+        if changes:
+            try:
+                pushed, pulled = client.exchange(changes)
+            except OSError as e:
+                client.restore(changes)
+                try:
+                    client.save_pending()
+                except OSError as save_error:
+                    logging.error(f"Erro ao guardar as alterações não enviadas: {save_error}")
+                logging.error(f"Erro ao enviar as alterações a {client.url}: {e}")
+                messagebox.showwarning("Aviso", f"Não foi possível enviar {len(changes)} alterações ao servidor. "
+                                                f"Elas foram guardadas em {SYNC_PENDING_FILE} e serão reenviadas "
+                                                f"na próxima conexão.")
+            else:
+                self.apply_sync(*client.apply(changes, pushed, pulled))
+        self.journal.reset()
+        logging.info(f"Desconectado do servidor de sincronização {client.url}")
+        self.update_status(f"Desconectado de {client.url}.")
+
+    def autosave(self):
+        # Compacta o diário em um novo snapshot quando ele cresce demais
+        self.root.after(self.AUTOSAVE_MS, self.autosave)
+        self.journal.flush()
+        if (self.model is None or self.model.persistent or self.autosave_job is not None
+                or self.journal.entries < ChangeJournal.COMPACT_ENTRIES):
+            return
+        mark = self.journal.mark()
+        job = self.autosave_job = IOJob(write_native, self.data.copy(), AUTOSAVE_FILE).start()
+        self.root.after(self.IO_POLL_MS, self.poll_autosave, job, mark)
+
+    def poll_autosave(self, job, mark):
+        if job is not self.autosave_job:
+            return
+        if not job.done():
+            self.root.after(self.IO_POLL_MS, self.poll_autosave, job, mark)
+            return
+        self.autosave_job = None
+        if job.error is not None:
+            logging.error(f"Erro no salvamento automático: {job.error}")
+        elif self.journal.compact(mark, AUTOSAVE_FILE, self.current_file):
+            logging.info(f"Diário de alterações compactado em: {AUTOSAVE_FILE}")
+
+    def open_database(self):
+        config = load_config()
+        file_path = filedialog.asksaveasfilename(defaultextension=".db", confirmoverwrite=False,
+                                                filetypes=[("Banco SQLite", "*.db")],
+                                                initialdir=config.get("last_dir", "."))
+        if file_path:
+            if self.sync is not None:
+                self.disconnect_sync()
+            try:
+                model = SQLiteInventory(file_path)
+            except sqlite3.Error as e:
+                logging.error(f"Erro ao abrir o banco: {e}")
+                messagebox.showerror("Erro", f"Erro ao abrir o banco: {e}")
+                self.update_status("Erro ao abrir o banco.")
+                return
+            if self.model.persistent:
+                self.model.close()
+            self.model = model
+            self.journal.discard()
+            self.table.first = 0
+            self.update_treeview()
+            self.current_file = file_path
+            logging.info(f"Banco SQLite aberto: {file_path}")
+            self.update_status(f"Banco SQLite aberto: {file_path}")
+            config["last_dir"] = os.path.dirname(file_path)
+            config["last_file"] = file_path
+            save_config(config)
+
+    def save_inventory(self, event=None, save_as=False):
+        if self.model is None:
+            return None
+        config = load_config()
+        if self.model.persistent and not save_as:
+            # No banco SQLite cada alteração já é gravada ao ser feita
+            self.update_status(f"Alterações já gravadas em: {self.model.path}")
+            return None
+        file_path = None if self.model.persistent else self.current_file
+        if save_as or not file_path or not file_path.endswith(NATIVE_EXTENSION):
+            file_path = filedialog.asksaveasfilename(defaultextension=NATIVE_EXTENSION,
+                                                    filetypes=[("Inventário", f"*{NATIVE_EXTENSION}")],
+                                                    initialdir=config.get("last_dir", "."))
+        if file_path:
+            mark = self.journal.mark()
+
+            def on_success(result):
+                logging.info(f"Tabela salva em: {file_path}")
+                self.update_status(f"Tabela salva em: {file_path}")
+                config["last_dir"] = os.path.dirname(file_path)
+                if not self.model.persistent:
+                    self.current_file = file_path # Atualiza o arquivo atual
+                    self.journal.compact(mark, file_path, file_path)
+                    config["last_file"] = file_path
+                # Com o banco SQLite aberto, "Salvar como" é uma cópia: o banco continua sendo o arquivo atual
+                save_config(config)
+            return self.run_io_job("Salvando...", "Erro ao salvar o arquivo",
+                                   write_native, (self.data.copy(), file_path), on_success)
+
+    def load_inventory(self):
+        config = load_config()
+        file_path = filedialog.askopenfilename(filetypes=[("Inventário", f"*{NATIVE_EXTENSION}")],
+                                                initialdir=config.get("last_dir", "."))
+        if file_path and self.confirm_replace():
+            self.run_io_job("Carregando...", "Erro ao carregar o arquivo", load_inventory_file,
+                            (read_native, (file_path,), self.database()),
+                            lambda result: self.on_file_loaded(result, file_path, config))
+
+    def confirm_replace(self):
+        # Antes de carregar um arquivo no lugar do inventário aberto
+        if self.sync is not None:
+            if not messagebox.askyesno("Confirmação", "Desconectar do servidor de sincronização e abrir o arquivo?"):
+                return False
+            self.disconnect_sync()
+        return not self.model.persistent or messagebox.askyesno(
+            "Confirmação", f"Substituir o conteúdo do banco {self.model.path} pelo arquivo carregado?")
+
+    def database(self):
+        # Banco SQLite aberto, preenchido pela thread de E/S com uma conexão própria
+        return self.model.path if self.model.persistent else None
+
+    def on_file_loaded(self, result, file_path, config):
+        model, dropped, rejected = result
+        if model is None:
+            # O banco foi preenchido por outra conexão: reabre para ler as colunas e o resumo novos
+            try:
+                model = SQLiteInventory(self.model.path)
+            except sqlite3.Error as e:
+                logging.error(f"Erro ao abrir o banco: {e}")
+                messagebox.showerror("Erro", f"Erro ao abrir o banco: {e}")
+                self.update_status("Erro ao abrir o banco.")
+                return
+            self.model.close()
+        self.model = model
+        self.table.first = 0
+        self.update_treeview()
+        logging.info(f"Tabela carregada de: {file_path}")
+        if not self.model.persistent:
+            logging.info(f"Memória do inventário: {self.model.memory_report()['Total'] / 2 ** 20:.1f} MB")
+        self.update_status(f"Tabela carregada de: {file_path}")
+        if dropped:
+            messagebox.showwarning("Aviso", f"{dropped} linhas com Número de Patrimônio repetido foram descartadas "
+                                            f"(prevaleceu a última ocorrência de cada item).")
+        if not self.model.persistent:
+            self.current_file = file_path # Atualiza o arquivo atual
+            self.journal.reset(file_path, file_path)
+            config["last_file"] = file_path
+        config["last_dir"] = os.path.dirname(file_path)
+        save_config(config)
+        if rejected is None:
+            return
+        if len(rejected):
+            logging.warning(f"{len(rejected)} linhas inválidas de {file_path} em quarentena")
+            messagebox.showwarning("Aviso", f"Tabela carregada, mas {len(rejected)} linhas inválidas foram "
+                                            f"separadas em: {quarantine_file(file_path)}")
+        else:
+            messagebox.showinfo("Sucesso", "Tabela carregada com sucesso!")
 
     def save_to_excel(self, event=None):
         config = load_config()
@@ -391,48 +3613,72 @@ class InventoryApp:
                                                 filetypes=[("Excel files", "*.xlsx")],
                                                 initialdir=initialdir)
         if file_path:
-            try:
-                self.start_progress()
-                self.data.to_excel(file_path, index=False)
+            def on_success(result):
                 logging.info(f"Tabela salva em: {file_path}")
                 self.update_status(f"Tabela salva em: {file_path}")
                 messagebox.showinfo("Sucesso", f"Tabela salva em: {file_path}")
-                self.current_file = file_path # Atualiza o arquivo atual
                 config["last_dir"] = os.path.dirname(file_path)
                 save_config(config)
-            except Exception as e:
-                logging.error(f"Erro ao salvar o arquivo: {e}")
-                messagebox.showerror("Erro", f"Erro ao salvar o arquivo: {e}")
-                self.update_status("Erro ao salvar o arquivo.")
-            finally:
-                self.stop_progress()
+            return self.export_rows(file_path, self.model.live_positions(), None, "Salvando...",
+                                    "Erro ao salvar o arquivo", on_success)
 
     def load_from_excel(self):
         config = load_config()
         initialdir = config.get("last_dir", ".")
         file_path = filedialog.askopenfilename(filetypes=[("Excel files", "*.xlsx")],
                                                 initialdir=initialdir)
-        if file_path:
+        if file_path and self.confirm_replace():
+            self.run_io_job("Carregando...", "Erro ao carregar o arquivo", load_inventory_file,
+                            (partial(import_excel, snapshot=True), (file_path, quarantine_file(file_path)),
+                             self.database()),
+                            lambda result: self.on_file_loaded(result, file_path, config))
+
+    def import_many_files(self):
+        # Junta as planilhas dos setores ao inventário aberto (inclui ou atualiza pelo Número de Patrimônio)
+        config = load_config()
+        paths = filedialog.askopenfilenames(filetypes=[("Planilhas", "*.xlsx *.csv"), ("Excel files", "*.xlsx"),
+                                                       ("CSV files", "*.csv")],
+                                            initialdir=config.get("last_dir", "."))
+        if not paths:
+            return
+        directory = os.path.dirname(paths[0])
+        conflicts_path = os.path.join(directory, MERGE_CONFLICTS_FILE)
+        quarantine_path = os.path.join(directory, MERGE_QUARANTINE_FILE)
+
+        def on_success(result):
+            merged, rejected, conflicts, totals = result
+            keys = merged[ASSET_COLUMN].tolist()
+            existing = [key in self.model for key in keys]
             try:
-                self.start_progress()
-                self.data = pd.read_excel(file_path)
-                self.update_treeview()
-                logging.info(f"Tabela carregada de: {file_path}")
-                self.update_status(f"Tabela carregada de: {file_path}")
-                messagebox.showinfo("Sucesso", "Tabela carregada com sucesso!")
-                self.current_file = file_path # Atualiza o arquivo atual
-                config["last_dir"] = os.path.dirname(file_path)
-                save_config(config)
-            except FileNotFoundError:
-                logging.error("Arquivo não encontrado.")
-                messagebox.showerror("Erro", "Arquivo não encontrado.")
-                self.update_status("Arquivo não encontrado.")
-            except Exception as e:
-                logging.error(f"Erro ao carregar o arquivo: {e}")
-                messagebox.showerror("Erro", f"Erro ao carregar o arquivo: {e}")
-                self.update_status("Erro ao carregar o arquivo.")
-            finally:
-                self.stop_progress()
+                with self.batch_update():
+                    added, updated = upsert_merged(self.model, merged)
+                    # O diário recebe a linha inteira, como ficou após a junção
+                    for key, exists in zip(keys, existing):
+                        self.record_change("update" if exists else "add", key, text_row(self.model.row(key)))
+            except (ValueError, sqlite3.Error) as e:
+                logging.error(f"Erro ao juntar os arquivos importados: {e}")
+                messagebox.showerror("Erro", f"Erro ao juntar os arquivos importados: {e}")
+                return
+            self.update_treeview()
+            message = (f"{totals['arquivos']} arquivos importados: {added} itens incluídos, {updated} atualizados, "
+                       f"{totals['duplicadas']} linhas repetidas ignoradas.")
+            self.update_status(message)
+            if totals["conflitos"] or len(rejected):
+                details = []
+                if totals["conflitos"]:
+                    details.append(f"{totals['conflitos']} itens com versões divergentes (prevaleceu o último "
+                                   f"arquivo da lista): {conflicts_path}")
+                if len(rejected):
+                    details.append(f"{len(rejected)} linhas inválidas em quarentena: {quarantine_path}")
+                messagebox.showwarning("Aviso", message + "\n\n" + "\n".join(details))
+            else:
+                messagebox.showinfo("Sucesso", message)
+            config["last_dir"] = directory
+            save_config(config)
+
+        self.run_io_job("Importando arquivos...", "Erro ao importar os arquivos", merge_inventory_files,
+                        (list(paths), conflicts_path, quarantine_path, None, set(self.model.keys())), on_success,
+                        unit="arquivos")
 
     def export_to_csv(self):
         config = load_config()
@@ -441,42 +3687,103 @@ class InventoryApp:
                                                 filetypes=[("CSV files", "*.csv")],
                                                 initialdir=initialdir)
         if file_path:
-            try:
-                self.start_progress()
-                self.data.to_csv(file_path, index=False)
+            def on_success(result):
                 logging.info(f"Tabela exportada para CSV em: {file_path}")
                 self.update_status(f"Tabela exportada para CSV em: {file_path}")
                 messagebox.showinfo("Sucesso", f"Tabela exportada para CSV em: {file_path}")
                 config["last_dir"] = os.path.dirname(file_path)
                 save_config(config)
-            except Exception as e:
-                logging.error(f"Erro ao exportar para CSV: {e}")
-                messagebox.showerror("Erro", f"Erro ao exportar para CSV: {e}")
-                self.update_status("Erro ao exportar para CSV.")
-            finally:
-                self.stop_progress()
-
-    def sort_column(self, column):
-        if column not in self.data.columns:
+            self.export_rows(file_path, self.model.live_positions(), None, "Exportando...",
+                             "Erro ao exportar para CSV", on_success)
+
+    def export_selection(self):
+        if self.model is None:
+            return
+        columns = self.model.columns if self.model.persistent else self.model.frame.columns
+        dialog = ExportDialog(self.root, list(columns), bool(self.active_filter))
+        self.root.wait_window(dialog)
+        if dialog.result is None:
+            return
+        view_only, columns = dialog.result
+        config = load_config()
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv",
+                                                filetypes=[("CSV files", "*.csv"), ("CSV compactado", "*.csv.gz"),
+                                                           ("Excel files", "*.xlsx")],
+                                                initialdir=config.get("last_dir", "."))
+        if not file_path:
+            return
+        positions = self.view if view_only else self.model.live_positions()
+
+        def on_success(rows):
+            logging.info(f"{rows} linhas exportadas para: {file_path}")
+            self.update_status(f"{rows} linhas exportadas para: {file_path}")
+            messagebox.showinfo("Sucesso", f"{rows} linhas exportadas para: {file_path}")
+            config["last_dir"] = os.path.dirname(file_path)
+            save_config(config)
+        self.export_rows(file_path, positions, columns, "Exportando...", "Erro ao exportar", on_success)
+
+    def export_rows(self, file_path, positions, columns, message, error_message, on_success):
+        # Grava em blocos, lidos do modelo pela thread de gravação (ver iter_view),
+        # em vez de uma cópia do inventário inteiro; a edição continua durante a gravação
+        if self.model.persistent:
+            source = self.model.path
+        else:
+            # No pandas 3 (Copy-on-Write) a cópia rasa basta; antes dele, iat escreveria nela também
+            source = self.model.frame.copy(deep=not PANDAS_3)
+        writer = write_excel_chunks if file_path.lower().endswith(".xlsx") else write_csv_chunks
+        chunks = iter_view(source, np.array(positions, copy=True), columns)
+        return self.run_io_job(message, error_message, writer, (chunks, file_path, len(positions)), on_success)
+
+    def sorted(self, positions):
+        # Todas as linhas vivas (positions=None) ou as informadas, na ordenação atual
+        if not self.sort_spec:
+            return self.model.live_positions() if positions is None else positions
+        return self.model.sorted_positions(self.sort_spec, positions)
+
+    def on_shift_click(self, event):
+        if self.tree.identify_region(event.x, event.y) != "heading":
+            return None
+        index = int(self.tree.identify_column(event.x)[1:]) - 1
+        self.sort_column(self.tree["columns"][index], extend=True)
+        return "break"
+
+    @timed("interface.sort_column")
+    def sort_column(self, column, extend=False):
+        if self.model is None:
+            return
+        columns = self.model.columns if self.model.persistent else self.model.frame.columns
+        if column not in columns:
             messagebox.showwarning("Aviso", f"A coluna '{column}' não existe no DataFrame.")
             return
 
-        if column in self.sort_order:
-            self.sort_order[column] = not self.sort_order[column]
+        spec = dict(self.sort_spec)
+        if column in spec and (extend or len(spec) == 1):
+            spec[column] = not spec[column]
+        elif extend:
+            spec[column] = True
         else:
-            self.sort_order[column] = True
-
-        ascending = self.sort_order[column]
+            spec = {column: True}
+        self.sort_spec = list(spec.items())
 
         try:
-            self.data = self.data.sort_values(by=[column], ascending=ascending, na_position='last')
+            # Só a lista de posições exibidas é reordenada; o filtro atual é mantido
+            self.update_treeview_with_rows(self.model.sorted_positions(self.sort_spec, self.view))
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao ordenar a coluna '{column}': {e}")
             return
+        self.update_sort_headings()
+        self.update_status("Ordenado por " + ", ".join(
+            f"'{name}' ({'ascendente' if ascending else 'descendente'})" for name, ascending in self.sort_spec) + ".")
 
-        self.update_treeview()
-        sort_direction = "ascendente" if ascending else "descendente"
-        self.update_status(f"Ordenado por '{column}' ({sort_direction}).")
+    def update_sort_headings(self):
+        spec = dict(self.sort_spec)
+        for column in self.tree["columns"]:
+            text = column
+            if column in spec:
+                text += " ▲" if spec[column] else " ▼"
+                if len(spec) > 1:
+                    text += str(list(spec).index(column) + 1)
+            self.tree.heading(column, text=text)
 
     def update_status(self, message):
         self.status_bar.config(text=message)
@@ -487,28 +3794,234 @@ class InventoryApp:
         root.geometry()
         save_config(config)
 
-        if messagebox.askokcancel("Sair", "Deseja salvar as alterações antes de sair?"):
-            self.save_to_excel()
+        if self.model is None and self.io_job is not None:
+            self.io_job.cancel()  # Ainda abrindo o inventário da inicialização
+        for job in (self.io_job, self.autosave_job):
+            if job is not None:
+                job.wait()
+        self.io_job = self.autosave_job = None
+        if self.sync is not None:
+            self.disconnect_sync()
+        if self.model is None:
+            self.journal.close()  # Um diário a recuperar continua para a próxima abertura
+        elif self.model.persistent:
+            self.model.close()
+        elif not self.journal.has_changes():
+            self.journal.discard()
+        elif messagebox.askokcancel("Sair", "Deseja salvar as alterações antes de sair?"):
+            job = self.save_inventory()
+            if job is not None:
+                # A janela vai ser destruída: espera a gravação terminar
+                job.wait()
+                self.io_job = None
+            if job is not None and job.error is None:
+                self.journal.discard()
+            else:
+                self.journal.close()  # Mantém o diário para recuperar na próxima abertura
+        else:
+            self.journal.discard()
+        if METRICS.profiling:
+            METRICS.stop_profile()
+            logging.info(f"Perfil gravado em: {Metrics.PROFILE_FILE}")
         self.root.destroy()
         logging.info("Aplicativo encerrado.")
 
     def adjust_column_widths(self):
-        for col in self.tree["columns"]:
-            max_width = 0
-            for item in self.tree.get_children():
-                if self.tree.set(item, col):
-                    max_width = max(max_width, tk.font.Font().measure(self.tree.set(item, col)))
-            self.tree.column(col, width=max_width + 20)  # Adiciona algum padding
+        self.apply_column_widths(self.column_widths.compute(self.model.sample(ColumnWidthEngine.SAMPLE_SIZE)))
+
+    @timed("larguras.aplicar")
+    def apply_column_widths(self, widths):
+        for col, width in widths.items():
+            self.tree.column(col, width=width + ColumnWidthEngine.PADDING)  # Adiciona algum padding
+        METRICS.count("tk.chamadas", len(widths))
 
     def start_progress(self):
-        self.progress_bar.pack(fill=tk.X, padx=10, pady=5)
-        self.progress_bar.start()
+        self.progress_bar.configure(value=0)
+        self.progress_frame.pack(fill=tk.X, padx=10, pady=5)
 
     def stop_progress(self):
-        self.progress_bar.stop()
-        self.progress_bar.pack_forget()
+        self.progress_frame.pack_forget()
+
+# Modo em lote, sem interface gráfica (ex.: sincronização noturna com o setor de compras):
+#   python TECHWATCHPY.py importar ENTRADA [ENTRADA ...] --inventario DESTINO [--rejeitados ARQUIVO.csv]
+#                                 [--processos N --conflitos ARQUIVO.csv]
+#   python TECHWATCHPY.py exportar INVENTARIO SAIDA(.csv, .csv.gz ou .xlsx) [--colunas "Setor,Nome"]
+#   python TECHWATCHPY.py servidor INVENTARIO [--endereco 127.0.0.1] [--porta 8765]
+#   (todos aceitam --metricas ARQUIVO.json e --perfil ARQUIVO.prof)
+# O inventário pode ser um arquivo nativo (.feather) ou um banco SQLite (.db).
+# As entradas (.csv/.xlsx) são lidas em blocos de IO_CHUNK_ROWS linhas; com um
+# banco SQLite a memória usada fica limitada a um bloco.
+def iter_table(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return iter_csv(path)
+    if extension in (".xlsx", ".xlsm"):
+        return iter_excel(path)
+    if extension == NATIVE_EXTENSION:
+        return iter_native(path)
+    if extension == ".db":
+        return iter_database(path)
+    raise ValueError(f"Formato não suportado: {path}")
+
+def iter_database(path):
+    inventory = SQLiteInventory(path)
+    try:
+        yield from inventory.iter_frames()
+    finally:
+        inventory.close()
+
+def open_inventory(path):
+    if path.lower().endswith(".db"):
+        return SQLiteInventory(path)
+    if not path.endswith(NATIVE_EXTENSION):
+        raise ValueError(f"O inventário deve ser um arquivo {NATIVE_EXTENSION} ou .db: {path}")
+    return InventoryModel(read_native(path) if os.path.exists(path) else None)
+
+def import_files(inputs, inventory_path, rejected_path=None):
+    inventory = open_inventory(inventory_path)
+    rejected = []
+    totals = {"lidas": 0, "incluídas": 0, "atualizadas": 0, "rejeitadas": 0}
+    start = time.perf_counter()
+    try:
+        for path in inputs:
+            file_start = time.perf_counter()
+            counts = dict.fromkeys(totals, 0)
+            for chunk in iter_table(path):
+                chunk = normalize_columns(chunk)  # Cabeçalhos como "Patrimonio" -> ASSET_COLUMN
+                if ASSET_COLUMN not in chunk.columns:
+                    raise ValueError(f"Coluna '{ASSET_COLUMN}' não encontrada em {path}.")
+                chunk = as_entered(chunk)
+                # Sem a coluna de um campo obrigatório, o arquivo só atualiza itens existentes
+                keys = set(inventory.keys()) if missing_required(chunk) else None
+                valid, bad = split_valid(chunk, keys)
+                if len(bad):
+                    bad.insert(0, "Arquivo", path)
+                    rejected.append(bad)
+                added, updated = inventory.upsert_frame(valid)
+                counts["lidas"] += len(chunk)
+                counts["incluídas"] += added
+                counts["atualizadas"] += updated
+                counts["rejeitadas"] += len(bad)
+            print(throughput(path, counts, time.perf_counter() - file_start))
+            for key, value in counts.items():
+                totals[key] += value
+        if not inventory.persistent:
+            write_native(inventory.live_frame(), inventory_path)
+    finally:
+        if inventory.persistent:
+            inventory.close()
+    if rejected_path and rejected:
+        write_csv(pd.concat(rejected, ignore_index=True), rejected_path)
+    print(throughput("Total", totals, time.perf_counter() - start))
+    logging.info(f"Importação em lote para {inventory_path}: {totals}")
+    return totals
+
+def merge_files(inputs, inventory_path, rejected_path=None, conflicts_path=None, workers=None):
+    # Como import_files, mas com os arquivos lidos em paralelo e juntados antes
+    # (repetições entre arquivos são resolvidas e relatadas em conflicts_path)
+    start = time.perf_counter()
+    inventory = open_inventory(inventory_path)
+    try:
+        merged, rejected, conflicts, totals = merge_inventory_files(inputs, conflicts_path, rejected_path, workers,
+                                                                    set(inventory.keys()))
+        added, updated = upsert_merged(inventory, merged)
+        if not inventory.persistent:
+            write_native(inventory.live_frame(), inventory_path)
+    finally:
+        if inventory.persistent:
+            inventory.close()
+    totals.update({"incluídas": added, "atualizadas": updated})
+    print(throughput("Total", totals, time.perf_counter() - start))
+    if totals["conflitos"]:
+        print(f"{totals['conflitos']} itens com dados divergentes entre arquivos"
+              + (f": {conflicts_path}" if conflicts_path else ""))
+    logging.info(f"Importação em lote (paralela) para {inventory_path}: {totals}")
+    return totals
+
+def select_columns(chunks, columns):
+    for chunk in chunks:
+        missing = [column for column in columns if column not in chunk.columns]
+        if missing:
+            raise ValueError(f"Colunas inexistentes: {', '.join(missing)}")
+        yield chunk[columns]
+
+def export_file(source, output, columns=None):
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"Arquivo não encontrado: {source}")
+    start = time.perf_counter()
+    chunks = iter_table(source) if columns is None else select_columns(iter_table(source), columns)
+    name = output.lower()
+    if name.endswith(".csv") or name.endswith(".csv.gz"):
+        rows = write_csv_chunks(chunks, output)
+    elif name.endswith(".xlsx"):
+        rows = write_excel_chunks(chunks, output)
+    else:
+        raise ValueError(f"Formato de exportação não suportado: {output}")
+    print(throughput(output, {"exportadas": rows}, time.perf_counter() - start))
+    logging.info(f"Exportação em lote de {source} para {output}: {rows} linhas")
+    return rows
+
+def serve_inventory(path, host, port):
+    server = SyncServer(path, host, port)
+    print(f"Servidor de sincronização em {server.url} (Ctrl+C para encerrar)")
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        pass
+
+def throughput(label, counts, seconds):
+    rows = max(counts.values())
+    details = ", ".join(f"{value} {key}" for key, value in counts.items())
+    return f"{label}: {details} em {seconds:.2f} s ({rows / max(seconds, 1e-9):,.0f} linhas/s)"
+
+def run_batch(argv):
+    parser = argparse.ArgumentParser(prog="TECHWATCHPY.py", description="Inventário de TI em modo lote.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("importar", help="inclui ou atualiza itens a partir de arquivos CSV/XLSX")
+    importer.add_argument("entradas", nargs="+")
+    importer.add_argument("--inventario", required=True, help=f"arquivo {NATIVE_EXTENSION} ou banco .db")
+    importer.add_argument("--rejeitados", help="CSV com as linhas inválidas e o motivo")
+    importer.add_argument("--processos", type=int, help="lê os arquivos em paralelo e junta-os antes de gravar "
+                                                         "(0: um processo por núcleo)")
+    importer.add_argument("--conflitos", help="CSV com os itens repetidos com dados divergentes (com --processos)")
+    exporter = commands.add_parser("exportar", help="exporta o inventário para CSV/XLSX")
+    exporter.add_argument("inventario")
+    exporter.add_argument("saida", help="arquivo .csv, .csv.gz ou .xlsx")
+    exporter.add_argument("--colunas", help="colunas a exportar, separadas por vírgula (padrão: todas)")
+    server = commands.add_parser("servidor", help="compartilha o inventário com outras cópias do aplicativo")
+    server.add_argument("inventario", help=f"arquivo {NATIVE_EXTENSION} ou banco .db")
+    server.add_argument("--endereco", default="127.0.0.1", help="interface de rede (padrão: só este computador)")
+    server.add_argument("--porta", type=int, default=SYNC_PORT)
+    for command in (importer, exporter, server):
+        command.add_argument("--metricas", help="grava os tempos por trecho e contadores em JSON")
+        command.add_argument("--perfil", help="grava um perfil do cProfile (.prof)")
+    args = parser.parse_args(argv)
+    if args.perfil:
+        METRICS.start_profile()
+    try:
+        if args.command == "importar" and args.processos is not None:
+            merge_files(args.entradas, args.inventario, args.rejeitados, args.conflitos, args.processos or None)
+        elif args.command == "importar":
+            import_files(args.entradas, args.inventario, args.rejeitados)
+        elif args.command == "exportar":
+            export_file(args.inventario, args.saida,
+                        [column.strip() for column in args.colunas.split(",")] if args.colunas else None)
+        else:
+            serve_inventory(args.inventario, args.endereco, args.porta)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        logging.error(f"Erro no modo lote: {e}")
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if args.perfil:
+            METRICS.stop_profile(args.perfil)
+        if args.metricas:
+            METRICS.export(args.metricas)
+    return 0
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_batch(sys.argv[1:]))
     root = tk.Tk()
     app = InventoryApp(root)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,402 @@
+# Micro-benchmarks do inventário (sem interface gráfica).
+# Uso: python benchmark.py [indice|armazenamento|memoria|inicializacao|suite|todos]
+#        [--tamanhos N ...] [--saida base.json] [--comparar base.json] [--excel-max N]
+# A suíte mede os caminhos usados pela interface (inclusão, filtro, ordenação,
+# atualização da tabela, larguras, Excel) em inventários sintéticos e grava
+# percentis de latência e pico de memória em JSON, para comparar execuções.
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tkinter as tk
+import tracemalloc
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from TECHWATCHPY import (ASSET_COLUMN, COLUMNS, ColumnWidthEngine, InventoryModel, display_rows, import_excel,
+                         normalize_details, read_excel, read_native, write_excel, write_native)
+
+SIZES = (10_000, 100_000, 1_000_000)
+STORAGE_SIZES = (5_000, 20_000, 50_000)
+MEMORY_SIZES = (100_000, 1_000_000)
+APPENDS = 200
+STARTUP_ROWS = (10_000, 50_000)
+SUITE_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+SUITE_SAMPLES = {1_000: 50, 10_000: 30, 100_000: 10, 1_000_000: 5}  # Operações sobre a tabela inteira
+ROW_SAMPLES = 200  # Inclusões, edições e exclusões (uma linha cada)
+EXCEL_SAMPLES = 3
+EXCEL_MAX_ROWS = 10_000  # Acima disso o XLSX leva minutos: fica fora da suíte por padrão
+PAGE_ROWS = 60  # Linhas visíveis formatadas a cada atualização da tabela
+QUERIES = ["dell", "setor:ti", "usuario12", "status:baixado notebook", "windows 11", "tela"]
+SORT_COLUMNS = ["Setor", "Data de Compra", "Nome", "Memória RAM"]
+TOLERANCE = 0.25  # Mediana mais lenta que isso em relação à linha de base é regressão
+NOISE_MS = 1.0  # Diferenças menores que isso são ruído
+
+# Roda em um processo novo (importações a frio), no diretório do config.json de
+# teste. Sem display, mede a abertura do último inventário fora da interface.
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import tkinter as tk
+import TECHWATCHPY
+result = {"importar módulo (s)": time.perf_counter() - start,
+          "pandas no import": float("pandas" in sys.modules)}
+try:
+    root = tk.Tk()
+except tk.TclError:
+    root = None
+if root is None:
+    result["primeira pintura (s)"] = float("nan")
+    TECHWATCHPY.open_last_inventory(TECHWATCHPY.config["last_file"])
+else:
+    app = TECHWATCHPY.InventoryApp(root)
+    root.update()
+    result["primeira pintura (s)"] = time.perf_counter() - start
+    while app.model is None or app.io_job is not None:
+        root.update()
+        time.sleep(0.005)
+    app.journal.discard()
+    root.destroy()
+result["interativo (s)"] = time.perf_counter() - start
+print(json.dumps(result))
+"""
+REPEAT = 200
+
+def make_frame(rows):
+    frame = pd.DataFrame({column: [""] * rows for column in COLUMNS})
+    frame[ASSET_COLUMN] = [f"P{i:07d}" for i in range(rows)]
+    return frame
+
+# Distribuições do inventário sintético: (valores, probabilidades)
+TYPES = (["Notebook", "Desktop", "Monitor", "Outros"], [0.45, 0.30, 0.20, 0.05])
+MODELS = {
+    "Notebook": ["Dell Latitude 5420", "Lenovo ThinkPad E14", "HP ProBook 440 G8", "Acer TravelMate P2"],
+    "Desktop": ["HP ProDesk 400 G7", "Dell OptiPlex 3080", "Lenovo ThinkCentre M70s", "Positivo Master D3200"],
+    "Monitor": ["LG 24MK430H", "Dell P2419H", "Samsung S24R350", "AOC 22B2HN"],
+    "Outros": ["Impressora HP LaserJet M428", "Nobreak SMS 1200VA", "Switch TP-Link 24p", "Projetor Epson X49"],
+}
+SECTORS = (["TI", "RH", "Financeiro", "Compras", "Diretoria", "Logística", "Comercial", "Jurídico"],
+           [0.10, 0.10, 0.15, 0.10, 0.05, 0.20, 0.25, 0.05])
+RAM = (["4", "8", "16", "32"], [0.10, 0.45, 0.35, 0.10])
+SYSTEMS = (["Windows 10", "Windows 11", "Ubuntu 22.04"], [0.40, 0.50, 0.10])
+PROCESSORS = (["i3-10100", "i5-1135G7", "i5-10400", "i7-1165G7", "Ryzen 5 5600U"], [0.15, 0.30, 0.25, 0.20, 0.10])
+STATUS = (["Ativo", "Em manutenção", "Baixado"], [0.85, 0.05, 0.10])
+NOTES = (["", "Tela trincada", "Bateria substituída", "Teclado com defeito", "Aguardando peça"],
+         [0.90, 0.03, 0.03, 0.02, 0.02])
+
+def make_inventory(rows, seed=0):
+    # Colunas como vêm de uma planilha (texto); RAM, S.O. e processador só em
+    # computadores, manutenção registrada em parte deles e sempre após a compra
+    rng = np.random.default_rng(seed)
+    positions = np.arange(rows)
+
+    def choice(values_and_weights, size=rows):
+        values, weights = values_and_weights
+        return rng.choice(np.array(values, dtype=object), size, p=weights)
+
+    kinds = choice(TYPES)
+    computer = np.isin(kinds, ["Notebook", "Desktop"])
+    models = np.empty(rows, dtype=object)
+    for kind, names in MODELS.items():
+        mask = kinds == kind
+        models[mask] = rng.choice(np.array(names, dtype=object), mask.sum())
+    # Dias desde 01/01/2014; o strftime é feito só uma vez por dia distinto
+    bought = rng.integers(0, 3650, rows)
+    serviced = bought + rng.integers(30, 1500, rows)
+    has_service = computer & (rng.random(rows) < 0.6) & (serviced < 4017)
+    days = (pd.Timestamp("2014-01-01") + pd.to_timedelta(np.arange(5150), unit="D")).strftime("%d/%m/%Y")
+    days = days.to_numpy(dtype=object)
+    users = np.array([f"usuario{i}" for i in rng.integers(0, max(rows // 3, 1), rows)], dtype=object)
+    users[rng.random(rows) < 0.1] = ""
+    blank = np.full(rows, "", dtype=object)
+    return pd.DataFrame({
+        "Número de Patrimônio": [f"P{i:07d}" for i in positions],
+        "Tipo": kinds,
+        "Nome": [f"TI-{i:06d}" for i in positions],
+        "Modelo": models,
+        "Setor": choice(SECTORS),
+        "Usuário": users,
+        "Memória RAM": np.where(computer, choice(RAM), blank),
+        "S.O.": np.where(computer, choice(SYSTEMS), blank),
+        "Processador": np.where(computer, choice(PROCESSORS), blank),
+        "Data de Compra": days[bought],
+        "Última Manutenção Feita": np.where(has_service, days[serviced], blank),
+        "Observações": choice(NOTES),
+        "Status": choice(STATUS),
+    }, columns=COLUMNS, dtype=object)
+
+def per_call_us(func, keys):
+    start = time.perf_counter()
+    for key in keys:
+        func(key)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+def elapsed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def bench_index(rows):
+    frame = make_frame(rows)
+    keys = random.Random(rows).sample(frame[ASSET_COLUMN].tolist(), REPEAT)
+    model = InventoryModel(frame)
+    column = frame[ASSET_COLUMN]
+
+    results = {
+        "busca (máscara)": per_call_us(lambda key: np.flatnonzero((column == key).to_numpy()), keys),
+        "busca (índice)": per_call_us(model.position, keys),
+        "duplicidade (isin)": per_call_us(lambda key: column.isin([key]).any(), keys),
+        "duplicidade (índice)": per_call_us(model.__contains__, keys),
+    }
+    # A exclusão antiga copiava o DataFrame inteiro a cada item removido
+    data = frame
+    results["exclusão (cópia)"] = per_call_us(lambda key: data[data[ASSET_COLUMN] != key], keys[:20])
+    results["exclusão (índice)"] = per_call_us(model.delete, keys)
+    return results
+
+def bench_storage(rows):
+    frame = make_inventory(rows)
+    with tempfile.TemporaryDirectory() as directory:
+        xlsx = os.path.join(directory, "inventario.xlsx")
+        native = os.path.join(directory, "inventario.feather")
+        results = {
+            "salvar xlsx (pandas)": elapsed(lambda: frame.to_excel(xlsx, index=False)),
+            "abrir xlsx (pandas)": elapsed(lambda: pd.read_excel(xlsx, dtype={ASSET_COLUMN: str})),
+            "salvar xlsx (streaming)": elapsed(write_excel, frame, xlsx),
+            "abrir xlsx (streaming)": elapsed(read_excel, xlsx),
+            "salvar nativo": elapsed(write_native, frame, native),
+            "abrir nativo": elapsed(read_native, native),
+            "abrir nativo (3 colunas)": elapsed(lambda: read_native(native, columns=["Setor", "Tipo", "Status"])),
+        }
+        results["tamanho xlsx (MB)"] = os.path.getsize(xlsx) / 2 ** 20
+        results["tamanho nativo (MB)"] = os.path.getsize(native) / 2 ** 20
+    return results
+
+def bench_memory(rows):
+    # Versão antiga: tudo em object, inclusões com pd.concat
+    frame = make_inventory(rows)
+    model = InventoryModel(frame)
+    typed = model.live_frame()
+    new_rows = [normalize_details({**frame.iloc[i % rows].to_dict(), ASSET_COLUMN: f"N{i:07d}"})
+                for i in range(APPENDS)]
+
+    def concat_appends():
+        data = frame
+        for row in new_rows:
+            data = pd.concat([data, pd.DataFrame([row])], ignore_index=True)
+
+    def buffer_appends():
+        for row in new_rows:
+            model.add(row)
+
+    results = {
+        "memória object (MB)": frame.memory_usage(index=False, deep=True).sum() / 2 ** 20,
+        "memória tipada (MB)": model.memory_report()["Total"] / 2 ** 20,
+        "ordenar Setor object (s)": elapsed(lambda: frame.sort_values("Setor", kind="stable")),
+        "ordenar Setor tipada (s)": elapsed(lambda: typed.sort_values("Setor", kind="stable")),
+        "ordenar Data object (s)": elapsed(lambda: frame.sort_values("Data de Compra", key=lambda column: pd.to_datetime(
+            column, format="%d/%m/%Y", errors="coerce"))),
+        "ordenar Data tipada (s)": elapsed(lambda: typed.sort_values("Data de Compra")),
+        "ordenar Data permutação (s)": elapsed(model.sorted_positions, [("Data de Compra", True)]),
+        "inverter Data em cache (s)": elapsed(model.sorted_positions, [("Data de Compra", False)]),
+        "ordenar Setor+Data (s)": elapsed(model.sorted_positions, [("Setor", True), ("Data de Compra", False)]),
+        "filtrar Setor object (s)": elapsed(lambda: frame[frame["Setor"] == "TI"]),
+        "filtrar Setor tipada (s)": elapsed(lambda: typed[typed["Setor"] == "TI"]),
+        "filtrar RAM object (s)": elapsed(lambda: frame[pd.to_numeric(frame["Memória RAM"], errors="coerce") >= 16]),
+        "filtrar RAM tipada (s)": elapsed(lambda: typed[typed["Memória RAM"] >= 16]),
+        "inclusão concat (ms)": elapsed(concat_appends) / APPENDS * 1000,
+        "inclusão buffer (ms)": elapsed(buffer_appends) / APPENDS * 1000,
+    }
+    return results
+
+def bench_startup(rows):
+    # Primeira abertura (lê o XLSX e grava o snapshot) e reabertura (pelo snapshot)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        xlsx = os.path.join(directory, "inventario.xlsx")
+        write_excel(make_inventory(rows), xlsx)
+        with open(os.path.join(directory, "config.json"), "w") as f:
+            json.dump({"geometry": "1200x800", "last_dir": directory, "last_file": xlsx}, f)
+        env = {**os.environ, "PYTHONPATH": os.path.dirname(os.path.abspath(__file__))}
+        for label in ("planilha", "snapshot"):
+            output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], cwd=directory, env=env,
+                                    capture_output=True, text=True, check=True).stdout
+            for name, value in json.loads(output).items():
+                results[f"{name} [{label}]"] = value
+    return results
+
+class ApproximateWidthEngine(ColumnWidthEngine):
+    # Sem display não há fonte do Tk: largura fixa por caractere, o resto do cálculo é o mesmo
+    CHAR_WIDTH = 7
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.heading_widths = {column: self.measure(column) for column in self.columns}
+        self.widths = {}
+        self.memo = OrderedDict()
+
+    def measure(self, text):
+        return len(text) * self.CHAR_WIDTH
+
+def width_engine():
+    # Com display (ex.: xvfb-run python benchmark.py suite) mede com a fonte de verdade
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return ApproximateWidthEngine(COLUMNS), None
+    root.withdraw()
+    return ColumnWidthEngine(COLUMNS, heading_font=('Arial', 10, 'bold')), root
+
+def measure(func, calls):
+    # Latência de cada chamada; a última roda sob o tracemalloc, só para o pico de memória
+    times = []
+    for args in calls[:-1]:
+        start = time.perf_counter()
+        func(*args)
+        times.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    func(*calls[-1])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    p50, p90, p99 = np.percentile(times, [50, 90, 99])
+    return {"amostras": len(times), "p50_ms": p50, "p90_ms": p90, "p99_ms": p99, "max_ms": max(times),
+            "pico_mb": peak / 2 ** 20}
+
+def bench_suite(rows, engine, directory, excel_max=EXCEL_MAX_ROWS):
+    # Mesmo trabalho dos métodos do InventoryApp, sem a parte do Tk
+    model = InventoryModel(make_inventory(rows, seed=rows))
+    count = SUITE_SAMPLES.get(rows, 5) + 1
+    extra = make_inventory(ROW_SAMPLES + 1, seed=1).to_dict("records")
+    new_rows = [normalize_details({**row, ASSET_COLUMN: f"N{i:07d}"}) for i, row in enumerate(extra)]
+    keys = model.live_frame()[ASSET_COLUMN].sample(2 * len(extra), random_state=0).tolist()
+
+    def sort_cold(spec):
+        model.sort_cache.clear()
+        model.sorted_positions(spec)
+
+    def refresh():
+        view = model.live_positions()
+        display_rows(model, view[:PAGE_ROWS])
+
+    results = {
+        "add_item_to_inventory": measure(model.add, [(row,) for row in new_rows]),
+        "update_item_in_inventory": measure(model.update, [
+            (key, {**row, ASSET_COLUMN: key}) for key, row in zip(keys, new_rows)]),
+        "delete_item": measure(model.delete, [(key,) for key in keys[len(extra):]]),
+        "filter_items": measure(model.search, [(QUERIES[i % len(QUERIES)],) for i in range(count)]),
+        "sort_column (frio)": measure(sort_cold, [
+            ([(SORT_COLUMNS[i % len(SORT_COLUMNS)], True)],) for i in range(count)]),
+        "sort_column (inverter)": measure(model.sorted_positions, [
+            ([("Data de Compra", i % 2 == 0)],) for i in range(count)]),
+        "update_treeview": measure(refresh, [()] * count),
+        "adjust_column_widths": measure(
+            lambda: engine.compute(model.sample(ColumnWidthEngine.SAMPLE_SIZE)), [()] * count),
+    }
+    if rows <= excel_max:
+        path = os.path.join(directory, f"inventario_{rows}.xlsx")
+        results["save_to_excel"] = measure(write_excel, [(model.live_frame(), path)] * (EXCEL_SAMPLES + 1))
+        results["load_from_excel"] = measure(import_excel, [(path,)] * (EXCEL_SAMPLES + 1))
+    return results
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB no Linux
+
+def compare(baseline, report, tolerance=TOLERANCE):
+    # Compara as medianas com a linha de base; retorna quantas operações regrediram
+    print(f"\nComparação com a linha de base de {baseline.get('gerado_em', '?')} (p50, ms)")
+    regressions = 0
+    for rows, operations in report["resultados"].items():
+        for name, stats in operations.items():
+            old = baseline.get("resultados", {}).get(rows, {}).get(name)
+            if old is None:
+                continue
+            ratio = stats["p50_ms"] / max(old["p50_ms"], 1e-9)
+            regressed = ratio > 1 + tolerance and stats["p50_ms"] - old["p50_ms"] > NOISE_MS
+            regressions += regressed
+            print(f"  {int(rows):>9,} {name:<28} {old['p50_ms']:>11.3f} {stats['p50_ms']:>11.3f}  x{ratio:5.2f}"
+                  + ("  REGRESSÃO" if regressed else ""))
+    return regressions
+
+def run_suite(sizes, output=None, baseline=None, excel_max=EXCEL_MAX_ROWS):
+    engine, root = width_engine()
+    report = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "fonte_tk": root is not None,
+        "resultados": {},
+        "rss_pico_mb": {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in sizes:
+            results = report["resultados"][str(rows)] = bench_suite(rows, engine, directory, excel_max)
+            report["rss_pico_mb"][str(rows)] = peak_rss_mb()
+            print(f"\n{rows:>9,} linhas (ms; pico em MB)")
+            print(f"  {'operação':<28} {'p50':>9} {'p90':>9} {'p99':>9} {'máx':>9} {'pico':>8}")
+            for name, stats in results.items():
+                print(f"  {name:<28} {stats['p50_ms']:>9.3f} {stats['p90_ms']:>9.3f} {stats['p99_ms']:>9.3f} "
+                      f"{stats['max_ms']:>9.3f} {stats['pico_mb']:>8.1f}")
+    if root is not None:
+        root.destroy()
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados gravados em {output}")
+    if baseline:
+        with open(baseline, encoding="utf-8") as f:
+            regressions = compare(json.load(f), report)
+        if regressions:
+            print(f"\n{regressions} operação(ões) mais lentas que a linha de base.")
+            return 1
+    return 0
+
+def main(which, args=None):
+    if which in ("indice", "todos"):
+        for rows in SIZES:
+            print(f"\n{rows:>9,} linhas (µs por operação)")
+            for name, value in bench_index(rows).items():
+                print(f"  {name:<26} {value:>12.2f}")
+    if which in ("armazenamento", "todos"):
+        for rows in STORAGE_SIZES:
+            print(f"\n{rows:>9,} linhas (segundos)")
+            for name, value in bench_storage(rows).items():
+                print(f"  {name:<26} {value:>12.3f}")
+    if which in ("memoria", "todos"):
+        for rows in MEMORY_SIZES:
+            print(f"\n{rows:>9,} linhas")
+            for name, value in bench_memory(rows).items():
+                print(f"  {name:<26} {value:>12.3f}")
+    if which in ("inicializacao", "todos"):
+        for rows in STARTUP_ROWS:
+            print(f"\n{rows:>9,} linhas (segundos desde o início do processo)")
+            for name, value in bench_startup(rows).items():
+                print(f"  {name:<34} {value:>12.3f}")
+    if which in ("suite", "todos"):
+        return run_suite(args.tamanhos, args.saida, args.comparar, args.excel_max)
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks do inventário de TI.")
+    parser.add_argument("modo", nargs="?", default="todos",
+                        choices=["indice", "armazenamento", "memoria", "inicializacao", "suite", "todos"])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=list(SUITE_SIZES), help="linhas (suíte)")
+    parser.add_argument("--saida", help="grava os resultados da suíte em JSON")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior, usado como linha de base")
+    parser.add_argument("--excel-max", type=int, default=EXCEL_MAX_ROWS,
+                        help="maior inventário em que o XLSX é medido")
+    args = parser.parse_args()
+    sys.exit(main(args.modo, args))
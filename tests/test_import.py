@@ -0,0 +1,97 @@
+import shutil
+
+import pandas as pd
+import pytest
+
+import TECHWATCHPY as T
+
+
+def base_row(key):
+    return {T.ASSET_COLUMN: key, "Tipo": "Desktop", "Nome": f"pc-{key}", "Setor": "TI", "Memória RAM": "8",
+            "Data de Compra": "10/01/2020"}
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    inventory = str(tmp_path / ("base" + T.NATIVE_EXTENSION))
+    T.write_native(pd.DataFrame([base_row(key) for key in ("P1", "P2", "P3")]), inventory)
+    first = tmp_path / "compras.csv"
+    first.write_text("Patrimonio,Nome,Setor,Tipo\nP1,a1,TI,Notebook\nP4,a4,RH,Monitor\n", encoding="utf-8")
+    # Sem Tipo, RAM e Data de Compra: esses campos não podem ser apagados no inventário
+    second = tmp_path / "rh.csv"
+    second.write_text("Número de Patrimônio,Nome,Setor\nP1,b1,TI\nP2,b2,RH\nP5,b5,RH\nP5,b5,RH\n", encoding="utf-8")
+    return inventory, [str(first), str(second)]
+
+
+def imported(inventory):
+    frame = T.open_inventory(inventory).live_frame()
+    frame = frame.sort_values(T.ASSET_COLUMN).reset_index(drop=True)
+    return frame.map(T.display_value)
+
+
+def test_parse_inventory_file_keeps_only_file_columns(files):
+    valid, rejected, seconds = T.parse_inventory_file(files[1][1])
+    assert list(valid.columns) == [T.ASSET_COLUMN, "Nome", "Setor"]
+    assert len(valid) == 4 and len(rejected) == 0
+
+
+def test_merge_frames_last_file_wins_per_column(files):
+    frames = [T.parse_inventory_file(path)[0] for path in files[1]]
+    merged, conflicts, duplicates = T.merge_frames(frames, files[1])
+    rows = merged.set_index(T.ASSET_COLUMN)
+    assert rows.loc["P1", "Nome"] == "b1" and rows.loc["P1", "Tipo"] == "Notebook"
+    assert pd.isna(rows.loc["P2", "Tipo"])  # Nenhum arquivo traz o Tipo de P2: não é alterado
+    assert duplicates == 1
+    # Só Nome diverge: o Tipo ausente no segundo arquivo não é conflito
+    assert conflicts["Campos divergentes"].unique().tolist() == ["Nome"]
+    assert conflicts.set_index("Arquivo")["Situação"].to_dict() == {files[1][0]: "descartada",
+                                                                   files[1][1]: "mantida"}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parallel_import_matches_sequential(files, tmp_path, workers):
+    inventory, paths = files
+    sequential = str(tmp_path / ("sequencial" + T.NATIVE_EXTENSION))
+    parallel = str(tmp_path / ("paralelo" + T.NATIVE_EXTENSION))
+    shutil.copy(inventory, sequential)
+    shutil.copy(inventory, parallel)
+    T.import_files(paths, sequential)
+    T.merge_files(paths, parallel, workers=workers)
+    expected = imported(sequential)
+    pd.testing.assert_frame_equal(imported(parallel), expected)
+    rows = expected.set_index(T.ASSET_COLUMN)
+    assert rows.loc["P1"][["Nome", "Tipo", "Memória RAM", "Data de Compra"]].tolist() == [
+        "b1", "Notebook", "8", "10/01/2020"]
+    assert rows.loc["P2"][["Nome", "Setor", "Tipo"]].tolist() == ["b2", "RH", "Desktop"]
+    assert sorted(rows.index) == ["P1", "P2", "P3", "P4", "P5"]
+
+
+@pytest.mark.parametrize("workers", [None, 1])
+def test_file_without_required_columns_only_updates(files, tmp_path, workers):
+    inventory, paths = files
+    users = tmp_path / "usuarios.csv"
+    users.write_text("Número de Patrimônio,Usuário\nP1,ana\nNEW1,rui\n", encoding="utf-8")
+    rejected = str(tmp_path / "rejeitados.csv")
+    if workers is None:
+        T.import_files([str(users)], inventory, rejected)
+    else:
+        T.merge_files([str(users)], inventory, rejected, workers=workers)
+    rows = imported(inventory).set_index(T.ASSET_COLUMN)
+    assert sorted(rows.index) == ["P1", "P2", "P3"]
+    assert rows.loc["P1"][["Usuário", "Nome", "Setor"]].tolist() == ["ana", "pc-P1", "TI"]
+    quarantine = pd.read_csv(rejected, dtype=str)
+    assert quarantine[[T.ASSET_COLUMN, "Erro"]].values.tolist() == [["NEW1", "O campo 'Nome' é obrigatório."]]
+
+
+def test_required_column_from_an_earlier_file(files, tmp_path):
+    # P4 é incluído pelo primeiro arquivo; o segundo, sem Nome/Setor, só o atualiza
+    inventory, paths = files
+    users = tmp_path / "usuarios.csv"
+    users.write_text("Número de Patrimônio,Usuário\nP4,ana\n", encoding="utf-8")
+    sequential = str(tmp_path / ("sequencial" + T.NATIVE_EXTENSION))
+    shutil.copy(inventory, sequential)
+    T.import_files([paths[0], str(users)], sequential)
+    T.merge_files([paths[0], str(users)], inventory, workers=1)
+    pd.testing.assert_frame_equal(imported(inventory), imported(sequential))
+    assert imported(inventory).set_index(T.ASSET_COLUMN).loc["P4", "Usuário"] == "ana"
@@ -0,0 +1,86 @@
+import pandas as pd
+import pytest
+
+import TECHWATCHPY as T
+
+
+@pytest.fixture(params=["memoria", "sqlite"])
+def inventory(request, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    if request.param == "memoria":
+        yield T.InventoryModel()
+    else:
+        inventory = T.SQLiteInventory(str(tmp_path / "inventario.db"))
+        yield inventory
+        inventory.close()
+
+
+def test_load_drops_repeated_keys(inventory):
+    frame = pd.DataFrame({T.ASSET_COLUMN: ["P1", "P2", "P1", "P3", "P2"],
+                          "Nome": ["velho-1", "velho-2", "novo-1", "pc-3", "novo-2"], "Setor": "TI"})
+    assert inventory.load(frame) == 2
+    assert len(inventory) == 3
+    assert [inventory.row(key)["Nome"] for key in ("P1", "P2", "P3")] == ["novo-1", "novo-2", "pc-3"]
+    # Sem linhas órfãs: depois de excluir o item, não sobra outra versão dele
+    inventory.delete("P1")
+    assert "P1" not in inventory and len(inventory) == 2
+    inventory.update("P2", {T.ASSET_COLUMN: "P2", "Nome": "editado", "Setor": "RH"})
+    assert sorted(inventory.live_frame()["Nome"]) == ["editado", "pc-3"]
+
+
+def make_frame(rows):
+    return pd.DataFrame([{T.ASSET_COLUMN: f"P{i:03d}", "Nome": f"pc-{i}", "Tipo": ["Desktop", "Notebook"][i % 2],
+                          "Setor": ["TI", "RH", "Financeiro"][i % 3], "Memória RAM": str(4 * (i % 3 + 1)),
+                          "Data de Compra": f"{i % 28 + 1:02d}/03/2020"} for i in range(rows)]).reindex(
+        columns=T.COLUMNS, fill_value="")
+
+
+def edit(inventory):
+    inventory.load(make_frame(40))
+    for i in range(5):
+        inventory.add({**make_frame(1).iloc[0].to_dict(), T.ASSET_COLUMN: f"N{i}", "Nome": f"novo-{i}", "Setor": "Compras"})
+    for i in range(0, 40, 3):
+        row = T.text_row(inventory.row(f"P{i:03d}"))
+        inventory.update(row[T.ASSET_COLUMN], dict(row, Nome=f"editado-{i}", **{"Observações": "revisar"}))
+    row = T.text_row(inventory.row("P001"))
+    inventory.update("P001", dict(row, **{T.ASSET_COLUMN: "P900", "Data de Compra": "sem nota"}))
+    for key in ("P002", "N3"):
+        inventory.delete(key)
+    inventory.upsert_frame(pd.DataFrame({T.ASSET_COLUMN: ["P004", "P950"], "Status": ["Em uso", "Estoque"]}))
+
+
+@pytest.mark.parametrize("pack", [False, True])
+def test_backends_agree(tmp_path, monkeypatch, pack):
+    monkeypatch.chdir(tmp_path)
+    if pack:
+        monkeypatch.setattr(T.InventoryModel, "PACK_MIN", 4)
+    memory = T.InventoryModel()
+    database = T.SQLiteInventory(str(tmp_path / "inventario.db"))
+    try:
+        edit(memory)
+        edit(database)
+        assert sorted(memory.keys()) == sorted(database.keys())
+        for key in memory.keys():
+            assert T.text_row(memory.row(key)) == T.text_row(database.row(key)), key
+        for query in ("pc-1", "editado", "setor:ti", "tipo:note revisar", "ram:8", "compras", "status:est", "sem nota"):
+            found = [sorted(inventory.rows_at(inventory.search(query))[T.ASSET_COLUMN])
+                     for inventory in (memory, database)]
+            assert found[0] == found[1], query
+        assert memory.summary() == database.summary()
+    finally:
+        database.close()
+
+
+def test_text_columns_are_packed(monkeypatch):
+    monkeypatch.setattr(T.InventoryModel, "PACK_MIN", 8)
+    monkeypatch.setattr(T.InventoryModel, "PACK_RATIO", 0)
+    model = T.InventoryModel(make_frame(20))
+    text = model.frame["Nome"].dtype
+    row = T.text_row(model.row("P000"))
+    model.update("P000", dict(row, Nome="editado"))
+    assert "Nome" in model.unpacked or not T.PANDAS_3
+    for i in range(7):  # Com a edição acima, a oitava linha gravada
+        model.add(dict(row, **{T.ASSET_COLUMN: f"N{i}", "Nome": f"novo-{i}"}))
+    assert not model.unpacked and model.frame["Nome"].dtype == text
+    assert model.row("P000")["Nome"] == "editado" and model.row("N6")["Nome"] == "novo-6"
+    assert model.search("novo-6").tolist() == [model.position("N6")]
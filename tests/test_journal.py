@@ -0,0 +1,58 @@
+import pandas as pd
+
+import TECHWATCHPY as T
+
+
+def make_row(key, name):
+    return dict(dict.fromkeys(T.COLUMNS, ""), **{T.ASSET_COLUMN: key, "Nome": name, "Setor": "TI"})
+
+
+def names(model):
+    frame = model.live_frame()
+    return dict(zip(frame[T.ASSET_COLUMN], frame["Nome"]))
+
+
+def write_base(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    base = str(tmp_path / ("base" + T.NATIVE_EXTENSION))
+    T.write_native(pd.DataFrame([make_row(f"P{i}", f"pc-{i}") for i in range(4)]), base)
+    return base
+
+
+def test_recover_inventory(tmp_path, monkeypatch):
+    base = write_base(tmp_path, monkeypatch)
+    journal = T.ChangeJournal(str(tmp_path / "inventory.journal"))
+    journal.reset(base, base)
+    journal.record("add", "P9", make_row("P9", "novo"))
+    journal.record("update", "P1", make_row("P8", "renomeado"))  # Troca de Número de Patrimônio
+    journal.record("delete", "P2")
+    journal.record("update", "P3", make_row("P3", "editado"))
+    journal.close()
+    with open(journal.path, "ab") as f:
+        f.write(b'{"op": "delete", "key": "P0"')  # Queda no meio da gravação
+
+    model, header, entries = T.recover_inventory(journal.path)
+    assert header == {"base": base, "file": base}
+    assert len(entries) == 4
+    assert names(model) == {"P0": "pc-0", "P3": "editado", "P8": "renomeado", "P9": "novo"}
+
+
+def test_compact_keeps_entries_after_mark(tmp_path, monkeypatch):
+    base = write_base(tmp_path, monkeypatch)
+    journal = T.ChangeJournal(str(tmp_path / "inventory.journal"))
+    journal.reset(base, base)
+    journal.record("update", "P0", make_row("P0", "antes"))
+    mark = journal.mark()
+    # Estado gravado no momento da marca; as alterações seguintes ficam no diário
+    saved = str(tmp_path / ("salvo" + T.NATIVE_EXTENSION))
+    T.write_native(T.recover_inventory(journal.path)[0].live_frame(), saved)
+    journal.record("delete", "P1")
+    journal.record("add", "P5", make_row("P5", "depois"))
+
+    assert journal.compact(mark, saved, saved)
+    journal.close()
+    model, header, entries = T.recover_inventory(journal.path)
+    assert header == {"base": saved, "file": saved}
+    assert [(entry["op"], entry["key"]) for entry in entries] == [("delete", "P1"), ("add", "P5")]
+    assert names(model) == {"P0": "antes", "P2": "pc-2", "P3": "pc-3", "P5": "depois"}
+    assert not journal.compact(mark, saved, saved)  # Marca de antes da compactação
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import TECHWATCHPY as T
+
+QUERIES = ["pc-1", "Setor:TI", "setor:log", "Nome:pc-2 ti", "ana", "Tipo:note Setor:rh", "01/2020", "zz", "renomeado",
+           "Tamanho:27", '"pc-3 "']
+
+
+def make_model(rows):
+    sectors = ["TI", "RH", "Logística", "Financeiro"]
+    types = ["Notebook", "Desktop", "Monitor"]
+    users = ["ana", "bruno", "carla", "daniel", "tiago"]
+    frame = pd.DataFrame({
+        T.ASSET_COLUMN: [f"P{i:05d}" for i in range(rows)],
+        "Tipo": [types[i % 3] for i in range(rows)],
+        "Nome": [f"pc-{i}" for i in range(rows)],
+        "Setor": [sectors[i % 4] for i in range(rows)],
+        "Usuário": [users[i % 5] if i % 7 else "" for i in range(rows)],
+        "Data de Compra": [f"{1 + i % 28:02d}/{1 + i % 12:02d}/2020" for i in range(rows)],
+    })
+    return T.InventoryModel(frame)
+
+
+def brute_force(model, query):
+    # Busca linha a linha, pelo texto exibido na tabela
+    positions = model.live_positions()
+    frame = model.rows_at(positions).map(lambda value: T.display_value(value).lower())
+    found = np.ones(len(frame), dtype=bool)
+    for column, value in T.parse_query(query, model.frame.columns):
+        if column is None:
+            matches = frame.apply(lambda row: any(value in cell for cell in row), axis=1)
+        else:
+            matches = frame[column].map(lambda text: T.term_matches(column, value, text))
+        found &= matches.to_numpy(dtype=bool)
+    return positions[found]
+
+
+def check(model):
+    for query in QUERIES:
+        assert np.array_equal(np.sort(model.search(query)), np.sort(brute_force(model, query))), query
+
+
+@pytest.mark.parametrize("direct_scan", [10, T.SearchIndex.DIRECT_SCAN])
+def test_search_matches_brute_force_after_edits(monkeypatch, direct_scan):
+    # direct_scan=10: as consultas passam pelo blob (com as linhas alteradas reavaliadas)
+    monkeypatch.setattr(T.SearchIndex, "DIRECT_SCAN", direct_scan)
+    monkeypatch.setattr(T.SearchIndex, "MAX_STALE", 50)
+    model = make_model(400)
+    model.search_index.build()
+    check(model)
+    model.add({T.ASSET_COLUMN: "N1", "Nome": "zz novo", "Setor": "TI", "Tamanho da Tela": "27"})
+    model.update("P00001", dict(model.row("P00001"), **{T.ASSET_COLUMN: "R1", "Nome": "renomeado", "Setor": "RH"}))
+    model.delete("P00002")
+    check(model)
+    model.upsert_frame(pd.DataFrame({T.ASSET_COLUMN: ["P00003", "N2"], "Nome": ["zz upsert", "pc-3 "],
+                                     "Setor": ["Logística", "TI"]}))
+    check(model)
+    for number in range(10, 70):  # Mais alterações que MAX_STALE: o blob é refeito
+        model.update(f"P{number:05d}", dict(model.row(f"P{number:05d}"), Nome=f"zz-{number}"))
+    check(model)
+    for number in range(100, 400):
+        model.delete(f"P{number:05d}")
+    model.compact()
+    check(model)
+
+
+def test_category_terms_match_from_the_start():
+    model = make_model(40)
+    sectors = set(model.rows_at(model.search("Setor:TI"))["Setor"].astype(str))
+    assert sectors == {"TI"}  # Não inclui "Logística"
+    assert set(model.rows_at(model.search("Setor:l"))["Setor"].astype(str)) == {"Logística"}
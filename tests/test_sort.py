@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import TECHWATCHPY as T
+
+
+def test_sort_ranks():
+    # Data que ficou como texto: datas em ordem, depois o texto que não converte, vazios por último
+    ranks, top = T.sort_ranks(pd.Series(["02/01/2020", "sem nota", "", None, "01/01/2021", "10/12/2019"],
+                                        dtype=object), "Data de Compra")
+    assert top == 5 and ranks.tolist() == [1, 4, 5, 5, 2, 0]
+    ranks, top = T.sort_ranks(pd.Series([8.0, np.nan, 4.0, 16.0]), "Memória RAM")
+    assert top == 3 and ranks.tolist() == [1, 3, 0, 2]
+    ranks, top = T.sort_ranks(pd.Series(["RH", "TI", None, "Compras"], dtype="category"), "Setor")
+    assert top == 3 and ranks.tolist() == [1, 2, 3, 0]
+
+
+def sort_value(column, text):
+    # Valor comparável como a tabela ordena: (vazio, não convertido, valor, texto)
+    if text == "":
+        return (True,)
+    parsed = None
+    try:
+        if column in T.DATE_COLUMNS:
+            parsed = datetime.strptime(text, T.DATE_FORMAT).timestamp()
+        elif column in T.NUMERIC_COLUMNS:
+            parsed = float(text)
+    except ValueError:
+        pass
+    return (False, parsed is None, parsed or 0, text)
+
+
+def row_values(model, spec, positions):
+    return [[sort_value(column, T.display_value(model.frame[column].iat[position])) for column, ascending in spec]
+            for position in positions]
+
+
+def reference_sort(values, spec):
+    # Sort estável do Python, da última chave para a primeira; vazios sempre por último
+    order = list(range(len(values)))
+    for index, (column, ascending) in reversed(list(enumerate(spec))):
+        order.sort(key=lambda i: values[i][index][1:], reverse=not ascending)
+        order.sort(key=lambda i: values[i][index][0])
+    return [values[i] for i in order]
+
+
+@pytest.fixture
+def model():
+    rng = np.random.default_rng(0)
+    rows = 300
+    frame = pd.DataFrame({
+        T.ASSET_COLUMN: [f"P{i:04d}" for i in range(rows)],
+        "Nome": rng.choice(["pc-a", "pc-b", "Pc-c", "notebook", ""], rows),
+        "Setor": rng.choice(["TI", "RH", "Compras", ""], rows),
+        "Memória RAM": rng.choice(["4", "8", "16", ""], rows),
+        "Data de Compra": rng.choice(["01/02/2020", "15/01/2020", "03/03/2019", ""], rows),
+        "Última Manutenção Feita": rng.choice(["10/10/2021", "sem registro", "02/05/2022", ""], rows),
+    }).reindex(columns=T.COLUMNS, fill_value="")
+    model = T.InventoryModel(frame)
+    # Alterações depois da carga: ordenações em cache precisam ser descartadas
+    model.sorted_positions([("Nome", True)])
+    for i in range(0, rows, 7):
+        model.delete(f"P{i:04d}")
+    for i in range(1, rows, 11):
+        if f"P{i:04d}" not in model:
+            continue
+        row = T.text_row(model.row(f"P{i:04d}"))
+        model.update(row[T.ASSET_COLUMN], dict(row, Nome="alterado", **{"Memória RAM": "32"}))
+    row = T.text_row(model.row("P0001"))
+    for i in range(5):
+        model.add(dict(row, **{T.ASSET_COLUMN: f"N{i}", "Setor": "Almoxarifado", "Data de Compra": ""}))
+    return model
+
+
+SPECS = [[(column, ascending)] for column in ("Nome", "Setor", "Memória RAM", "Data de Compra",
+                                              "Última Manutenção Feita") for ascending in (True, False)]
+SPECS += [[("Setor", True), ("Memória RAM", False)], [("Data de Compra", False), ("Nome", True)],
+          [("Setor", False), ("Última Manutenção Feita", True), ("Nome", False)]]
+
+
+@pytest.mark.parametrize("spec", SPECS, ids=lambda spec: ",".join(f"{c}{'+' if a else '-'}" for c, a in spec))
+def test_sorted_positions(model, spec):
+    order = model.sorted_positions(spec)
+    live = model.live_positions()
+    assert sorted(order.tolist()) == live.tolist()
+    assert row_values(model, spec, order) == reference_sort(row_values(model, spec, live), spec)
+    # Só as posições de um filtro, na mesma ordem
+    subset = live[::3]
+    filtered = model.sorted_positions(spec, subset)
+    assert sorted(filtered.tolist()) == subset.tolist()
+    assert filtered.tolist() == [position for position in order if position in set(subset.tolist())]
+
+
+def test_sorted_positions_combined_and_lexsort_agree(model, monkeypatch):
+    spec = [("Setor", True), ("Data de Compra", False), ("Nome", True)]
+    combined = model.sorted_positions(spec)
+    # Força o lexsort (muitas chaves distintas) e compara com a chave inteira combinada
+    monkeypatch.setattr(T.np, "prod", lambda *args, **kwargs: float(2 ** 63))
+    assert model.sorted_positions(spec).tolist() == combined.tolist()
@@ -0,0 +1,112 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import TECHWATCHPY as T
+
+
+def make_frame(rows):
+    frame = pd.DataFrame([{T.ASSET_COLUMN: f"P{i:03d}", "Nome": f"pc-{i}", "Setor": "TI"} for i in range(rows)])
+    return frame.reindex(columns=T.COLUMNS, fill_value="")
+
+
+def exchange(client):
+    changes = client.take_pending()
+    return client.apply(changes, *client.exchange(changes))
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / ("inventario" + T.NATIVE_EXTENSION))
+    T.write_native(make_frame(5), path)
+    server = T.SyncServer(path, port=0).start()
+    yield server
+    server.stop()
+
+
+def test_sync_two_clients(server):
+    a, b = T.SyncClient(server.url), T.SyncClient(server.url)
+    frame_a, frame_b = exchange(a)[0], exchange(b)[0]
+    assert len(frame_a) == len(frame_b) == 5
+    row = frame_a.iloc[0].to_dict()
+    key = row[T.ASSET_COLUMN]
+
+    # Edição simultânea da mesma linha: a segunda a chegar é recusada e recebe a do servidor
+    a.record("update", key, dict(row, Nome="editado-a"))
+    b.record("update", key, dict(row, Nome="editado-b"))
+    assert exchange(a)[3] == []
+    frame, rows, deleted, conflicts = exchange(b)
+    assert [conflict["chave"] for conflict in conflicts] == [key]
+    assert conflicts[0]["linha_servidor"]["Nome"] == "editado-a"
+    assert server.inventory.row(key)["Nome"] == "editado-a"
+    assert not b.pending
+
+    # Troca de Número de Patrimônio: exclusão da chave antiga e inclusão da nova
+    a.record("update", key, dict(row, **{T.ASSET_COLUMN: "P900", "Nome": "renomeado"}))
+    assert [(change["chave"], change["op"]) for change in a.pending.values()] == [(key, "delete"), ("P900", "upsert")]
+    assert exchange(a)[3] == []
+    assert key not in server.inventory and server.inventory.row("P900")["Nome"] == "renomeado"
+    frame, rows, deleted, conflicts = exchange(b)
+    assert frame is None and conflicts == []
+    assert [row[T.ASSET_COLUMN] for row in rows] == ["P900"]
+    assert deleted == [key]
+
+    # Exclusão vista pelo outro cliente na troca seguinte
+    b.record("delete", "P001")
+    exchange(b)
+    frame, rows, deleted, conflicts = exchange(a)
+    assert rows == [] and deleted == ["P001"]
+    assert "P001" not in server.inventory and len(server.inventory) == 4
+
+    # Um cliente novo recebe o inventário inteiro, já sem as linhas excluídas
+    frame = exchange(T.SyncClient(server.url))[0]
+    assert sorted(frame[T.ASSET_COLUMN]) == ["P002", "P003", "P004", "P900"]
+
+
+@pytest.mark.parametrize("extension", [T.NATIVE_EXTENSION, ".db"])
+def test_sync_server_restarts(tmp_path, monkeypatch, extension):
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / ("inventario" + extension))
+    if extension == ".db":
+        inventory = T.SQLiteInventory(path)
+        inventory.load(make_frame(3))
+        inventory.close()
+    else:
+        T.write_native(make_frame(3), path)
+    server = T.SyncServer(path, port=0).start()
+    client = T.SyncClient(server.url)
+    row = exchange(client)[0].iloc[0].to_dict()
+    client.record("update", "P000", dict(row, Nome="aceito"))
+    assert exchange(client)[3] == []
+    epoch = server.epoch
+    server.stop()
+    assert not os.path.exists(server.lock_path) and not os.path.exists(server.journal_path)
+
+    # Encerramento normal: mesma época, o cliente só recebe o que mudou
+    server = T.SyncServer(path, port=0).start()
+    client.url = server.url
+    assert server.epoch == epoch
+    assert exchange(client)[0] is None
+    client.record("update", "P001", dict(row, **{T.ASSET_COLUMN: "P001", "Nome": "confirmado"}))
+    assert exchange(client)[3] == []
+    # Queda do servidor: os arquivos ficam como estão neste momento (nada foi regravado ainda)
+    crashed = tmp_path / "queda"
+    crashed.mkdir()
+    for name in os.listdir(tmp_path):
+        if name.startswith("inventario"):
+            shutil.copy(tmp_path / name, crashed / name)
+    server.stop()
+
+    # Depois da queda: a alteração confirmada ao cliente está no inventário, e a
+    # época nova faz o cliente recarregar tudo (as versões podem ter ficado para trás)
+    server = T.SyncServer(str(crashed / os.path.basename(path)), port=0).start()
+    try:
+        client.url = server.url
+        assert server.epoch != epoch
+        frame = exchange(client)[0]
+        assert frame is not None and frame.set_index(T.ASSET_COLUMN).loc["P001", "Nome"] == "confirmado"
+    finally:
+        server.stop()
@@ -0,0 +1,44 @@
+import pandas as pd
+
+import TECHWATCHPY as T
+
+
+def frame(rows):
+    return T.as_entered(pd.DataFrame(rows, dtype=object))
+
+
+def test_validate_frame_checks_present_columns():
+    errors = T.validate_frame(frame([
+        {T.ASSET_COLUMN: "P1", "Nome": "pc", "Setor": "TI", "Data de Compra": "10/01/2020", "Memória RAM": "8"},
+        {T.ASSET_COLUMN: "P2", "Nome": "", "Setor": "TI", "Data de Compra": "", "Memória RAM": ""},
+        {T.ASSET_COLUMN: "P3", "Nome": "pc", "Setor": "TI", "Data de Compra": "2020-01-10", "Memória RAM": "8"},
+        {T.ASSET_COLUMN: "P4", "Nome": "pc", "Setor": "TI", "Data de Compra": "01/01/2999", "Memória RAM": "8"},
+        {T.ASSET_COLUMN: "P5", "Nome": "pc", "Setor": "TI", "Data de Compra": "", "Memória RAM": "muita"},
+    ]))
+    assert errors.tolist() == [None, "O campo 'Nome' é obrigatório.", "Formato de data inválido (DD/MM/YYYY).",
+                               "A data de compra não pode ser futura.", "Memória RAM deve ser um número."]
+
+
+def test_validate_frame_accepts_dialog_labels():
+    errors = T.validate_frame(frame([{T.ASSET_COLUMN: "P1", "Nome": "pc", "Setor": "TI",
+                                      "Data de Compra (DD/MM/YYYY)": "31/02/2020"}]))
+    assert errors.tolist() == ["Formato de data inválido (DD/MM/YYYY)."]
+
+
+def test_missing_required_column_only_allows_updates():
+    rows = frame([{T.ASSET_COLUMN: "P1", "Usuário": "ana"}, {T.ASSET_COLUMN: "NEW1", "Usuário": "rui"}])
+    assert T.missing_required(rows) == ["Nome", "Setor"]
+    # Sem o inventário, toda linha é uma inclusão
+    assert T.validate_frame(rows).tolist() == ["O campo 'Nome' é obrigatório."] * 2
+    assert T.validate_frame(rows, {"P1", "P2"}).tolist() == [None, "O campo 'Nome' é obrigatório."]
+
+
+def test_split_valid():
+    rows = frame([{T.ASSET_COLUMN: "P1", "Nome": "pc", "Setor": "TI"},
+                  {T.ASSET_COLUMN: "", "Nome": "pc", "Setor": "TI"},
+                  {T.ASSET_COLUMN: "P3", "Nome": "pc", "Setor": ""}])
+    valid, rejected = T.split_valid(rows)
+    assert valid[T.ASSET_COLUMN].tolist() == ["P1"]
+    assert list(rejected.columns) == ["Erro"] + list(rows.columns)
+    assert rejected["Erro"].tolist() == [f"O campo '{T.ASSET_COLUMN}' é obrigatório.", "O campo 'Setor' é obrigatório."]
+    assert rejected.index.tolist() == [1, 2]